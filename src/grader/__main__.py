@@ -1,6 +1,7 @@
 import asyncio
+import sys
 
-# from grader.bot.handlers.admin.register import RegisterAdminHandlers
+from grader.bot.handlers.admin.register import RegisterAdminHandlers
 from grader.bot.handlers.client.register import RegisterClientHandlers
 from grader.bot.handlers.forall.register import (
     RegisterHandlerCancel,
@@ -13,9 +14,15 @@ from grader.bot.lib.notification.pending import ProcessPendingUpdates
 from grader.bot.lifecycle.creator import bot, dp
 from grader.bot.lifecycle.menu import SetMenu
 from grader.core.configs.paths import EnsurePaths
-from grader.core.logs import flow as logs
+from grader.core.configs.settings import settings
+from grader.core.logs import flow as logs, worker as worker_logs
 from grader.core.logs.bot import LoggerSetup
 from grader.db.session import EnsureDB
+from grader.llm.client import openrouter
+from grader.llm.execute import kernel_pool
+from grader.llm.executor import grading_executor
+from grader.llm.report import report_renderer
+from grader.worker.run import grading_worker
 
 
 async def EnsureDependencies() -> None:
@@ -25,16 +32,29 @@ async def EnsureDependencies() -> None:
 async def OnStartup() -> None:
     await SetMenu()
     RegisterHandlerCancel(dp)
-    # RegisterAdminHandlers(dp)
+    RegisterAdminHandlers(dp)
     RegisterClientHandlers(dp)
     RegisterHandlerZeroMessage(dp)
     SetBotMiddleware(dp)
 
+    grading_executor.Start()
+    report_renderer.Start()
+    kernel_pool.Start()
+    openrouter.Start()
+    if settings.GRADING_BOT_RUNS_WORKER:
+        await grading_worker.Start()
+
     await admin.NotifyOnStartup()
     await ProcessPendingUpdates()
 
 
 async def OnShutdown() -> None:
+    if settings.GRADING_BOT_RUNS_WORKER:
+        await grading_worker.Stop()
+    await openrouter.Close()
+    await kernel_pool.Shutdown()
+    await report_renderer.Shutdown()
+    await grading_executor.Shutdown()
     await admin.NotifyOnShutdown()
 
     await logs.LoggerShutdown()
@@ -54,6 +74,34 @@ async def main() -> None:
     await dp.start_polling(bot, drop_pending_updates=True)
 
 
+async def worker_main() -> None:
+    EnsurePaths()
+    await logs.LoggerStart(worker_logs.LoggerSetup)
+
+    await EnsureDependencies()
+
+    grading_executor.Start()
+    report_renderer.Start()
+    kernel_pool.Start()
+    openrouter.Start()
+    await grading_worker.Start()
+
+    try:
+        await grading_worker.Wait()
+    finally:
+        await grading_worker.Stop()
+        await openrouter.Close()
+        await kernel_pool.Shutdown()
+        await report_renderer.Shutdown()
+        await grading_executor.Shutdown()
+
+        await logs.LoggerShutdown()
+
+
 # $ python -m grader
+# $ python -m grader worker
 if __name__ == "__main__":
-    asyncio.run(main())
+    if sys.argv[1:] == ["worker"]:
+        asyncio.run(worker_main())
+    else:
+        asyncio.run(main())
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from aiogram import F, Router, types
+from aiogram.filters.command import Command, CommandObject
+
+from grader.bot.lib.message.io import SendMessage
+from grader.core.configs.constants import ADMIN_CHAT_IDS
+from grader.db.models.common.time import utcnow
+from grader.services.llm_call import LLMCallService
+
+router = Router()
+router.message.filter(F.chat.id.in_(ADMIN_CHAT_IDS))
+
+_DEFAULT_DAYS = 7
+_MAX_DAYS = 31  # one line per day must fit into a Telegram message
+_TOP_USERS = 10
+
+
+def _Days(command: CommandObject) -> int:
+    try:
+        return min(_MAX_DAYS, max(1, int(command.args or _DEFAULT_DAYS)))
+    except ValueError:
+        return _DEFAULT_DAYS
+
+
+@router.message(Command("stats"))
+async def CommandStats(message: types.Message, command: CommandObject) -> None:
+    """
+    `/stats [days]`: LLM latency, tokens per submission and spend from `llm_calls`.
+    """
+    days = _Days(command)
+    since = utcnow() - timedelta(days=days)
+    srv = LLMCallService.Create()
+
+    latencies = await srv.GetLatencyPercentiles(since)
+    per_submission = await srv.GetTokensPerSubmission(since)
+    per_day = await srv.GetSpendPerDay(since)
+    per_user = await srv.GetSpendPerUser(since, limit=_TOP_USERS)
+
+    lines = [f"📊 LLM за {days} дн."]
+
+    lines.append("\nЗадержка (p50 / p95):")
+    for latency in latencies:
+        lines.append(
+            f"- {latency.stage.value} {latency.model}: "
+            f"{latency.p50:.1f}s / {latency.p95:.1f}s, {latency.calls} вызовов"
+        )
+    if not latencies:
+        lines.append("- нет данных")
+
+    lines.append(
+        f"\nНа решение ({per_submission.submissions} решений): "
+        f"{per_submission.input_tokens:.0f} входных "
+        f"({per_submission.cached_tokens:.0f} из кэша), "
+        f"{per_submission.output_tokens:.0f} выходных токенов, "
+        f"${per_submission.cost:.4f}"
+    )
+
+    lines.append("\nПо дням:")
+    for day in per_day:
+        lines.append(
+            f"- {day.key}: {day.calls} вызовов, {day.tokens} токенов, ${day.cost:.4f}"
+        )
+
+    lines.append(f"\nТоп-{_TOP_USERS} пользователей:")
+    for user in per_user:
+        lines.append(
+            f"- {user.key}: {user.calls} вызовов, {user.tokens} токенов, ${user.cost:.4f}"
+        )
+
+    await SendMessage(chat_id=message.chat.id, text="\n".join(lines))
@@ -0,0 +1,9 @@
+from aiogram import Dispatcher
+
+from grader.bot.handlers.admin.commands import stats
+
+
+def RegisterAdminHandlers(dp: Dispatcher) -> None:
+    dp.include_routers(
+        stats.router,
+    )
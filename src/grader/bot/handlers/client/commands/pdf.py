@@ -0,0 +1,39 @@
+from aiogram import Router, types
+from aiogram.filters.command import Command
+
+from grader.bot.lib.grading.jobs import PDF_COMMAND
+from grader.bot.lib.message.filter import VerifiedFilter
+from grader.bot.lib.message.io import SendMessage
+from grader.bot.lib.message.keyboard import ipynb_keyboard
+from grader.db.models.user import User
+from grader.services.user import UserService
+
+router = Router()
+
+
+@router.message(Command(PDF_COMMAND), VerifiedFilter())
+async def CommandTogglePDF(message: types.Message) -> None:
+    """
+    `/pdf`: the score summary is always sent; the PDF report only if enabled.
+    """
+    srv = UserService.Create()
+
+    current = await srv.GetUser(chat_id=message.chat.id, column=User.send_pdf)
+    send_pdf = current is False  # unset counts as enabled
+
+    await srv.UpdateUser(
+        chat_id=message.chat.id,
+        column=User.send_pdf,
+        value=send_pdf,
+    )
+
+    if send_pdf:
+        text = "✅ PDF-отчеты включены: после сводки баллов придет полный отчет"
+    else:
+        text = "✅ PDF-отчеты отключены: после проверки придет только сводка баллов"
+
+    await SendMessage(
+        chat_id=message.chat.id,
+        text=f"{text}\n\nПереключить: /{PDF_COMMAND}",
+        reply_markup=ipynb_keyboard,
+    )
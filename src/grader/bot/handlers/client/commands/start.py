@@ -7,13 +7,20 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup, ReplyKeyboardRemove
 
+from grader.bot.lib.grading.jobs import (
+    FORCE_CAPTION,
+    IsChatBusy,
+    SubmitBatchGrading,
+    SubmitReferenceProcessing,
+    SubmitStudentGrading,
+)
 from grader.bot.lib.message.filter import VerifiedFilter
-from grader.bot.lib.message.io import ContextIO, SendDocument, SendMessage
+from grader.bot.lib.message.io import ContextIO, SendMessage
+from grader.bot.lib.message.keyboard import ipynb_keyboard
 from grader.bot.lifecycle.creator import bot
 from grader.core.configs.paths import DIR_NOTEBOOKS
 from grader.db.models.user import User
-from grader.llm.reference import ProcessReference
-from grader.llm.grader import GradeInputNotebook
+from grader.llm.batch import ARCHIVE_NAME
 from grader.services.user import UserService
 
 router = Router()
@@ -24,17 +31,7 @@ class StartStates(StatesGroup):
     Terms = State()
     GetReferenceNotebook = State()
     GetStudentNotebook = State()
-
-
-ipynb_keyboard = ReplyKeyboardMarkup(
-    keyboard=[
-        [
-            KeyboardButton(text="📥 Эталон"),
-            KeyboardButton(text="🔍 Студент"),
-        ]
-    ],
-    resize_keyboard=True,
-)
+    GetStudentArchive = State()
 
 
 @router.message(StateFilter(None), Command("start"), VerifiedFilter())
@@ -119,6 +116,7 @@ def _EnsureNotebookDirectories(chat_id: int) -> None:
     base_dir = DIR_NOTEBOOKS / f"notebook_{chat_id}"
     (base_dir / "reference").mkdir(parents=True, exist_ok=True)
     (base_dir / "student").mkdir(parents=True, exist_ok=True)
+    (base_dir / "batch").mkdir(parents=True, exist_ok=True)
 
 
 def _GetNotebookPath(chat_id: int, folder: str) -> Path:
@@ -140,6 +138,24 @@ def _IsNotebook(document: types.Document | None) -> bool:
     return document.file_name.lower().endswith(".ipynb")
 
 
+def _IsArchive(document: types.Document | None) -> bool:
+    if document is None or document.file_name is None:
+        return False
+    return document.file_name.lower().endswith(".zip")
+
+
+async def _RejectIfBusy(chat_id: int) -> bool:
+    if not await IsChatBusy(chat_id):
+        return False
+
+    await SendMessage(
+        chat_id=chat_id,
+        text="⏳ Предыдущая проверка еще выполняется. Пожалуйста, дождитесь результата и отправьте файл снова",
+        context=ContextIO.UserFailed,
+    )
+    return True
+
+
 @router.message(StateFilter(None), F.text == "📥 Эталон", VerifiedFilter())
 async def CommandReferenceNotebook(message: types.Message, state: FSMContext) -> None:
     await SendMessage(
@@ -158,6 +174,15 @@ async def CommandStudentNotebook(message: types.Message, state: FSMContext) -> N
     await state.set_state(StartStates.GetStudentNotebook)
 
 
+@router.message(StateFilter(None), F.text == "📦 Архив студентов", VerifiedFilter())
+async def CommandStudentArchive(message: types.Message, state: FSMContext) -> None:
+    await SendMessage(
+        chat_id=message.chat.id,
+        text="Пожалуйста, отправьте архив .zip с решениями студентов в формате .ipynb",
+    )
+    await state.set_state(StartStates.GetStudentArchive)
+
+
 @router.message(StateFilter(StartStates.GetReferenceNotebook))
 async def CommandUploadReferenceNotebook(
     message: types.Message,
@@ -172,6 +197,9 @@ async def CommandUploadReferenceNotebook(
         return
     assert message.document is not None
 
+    if await _RejectIfBusy(message.chat.id):
+        return
+
     _EnsureNotebookDirectories(message.chat.id)
     await _SaveNotebook(
         document=message.document,
@@ -185,20 +213,9 @@ async def CommandUploadReferenceNotebook(
         reply_markup=ipynb_keyboard,
     )
 
-    ProcessReference(a)
+    force = (message.caption or "").strip().lower() == FORCE_CAPTION
+    await SubmitReferenceProcessing(message.chat.id, a, force=force)
 
-    await SendMessage(
-        chat_id=message.chat.id,
-        text="✅ Эталонное решение загружено и обработано",
-        reply_markup=ipynb_keyboard,
-    )
-
-    srv = UserService.Create()
-    await srv.UpdateUser(
-        chat_id=message.chat.id,
-        column=User.has_reference,
-        value=True,
-    )
     await state.clear()
 
 
@@ -231,6 +248,9 @@ async def CommandUploadStudentNotebook(
         return
     assert message.document is not None
 
+    if await _RejectIfBusy(message.chat.id):
+        return
+
     _EnsureNotebookDirectories(message.chat.id)
     await _SaveNotebook(
         document=message.document,
@@ -245,22 +265,61 @@ async def CommandUploadStudentNotebook(
 
     a = DIR_NOTEBOOKS / f"notebook_{message.chat.id}"
 
-    GradeInputNotebook(a)
+    assert message.document.file_name is not None
+    await SubmitStudentGrading(message.chat.id, a, message.document.file_name)
 
-    result_path = a / "student" / "result.pdf"
-    if not result_path.exists():
+    await state.clear()
+
+
+@router.message(StateFilter(StartStates.GetStudentArchive))
+async def CommandUploadStudentArchive(
+    message: types.Message,
+    state: FSMContext,
+) -> None:
+    srv = UserService.Create()
+
+    has_reference = await srv.GetUser(
+        chat_id=message.chat.id,
+        column=User.has_reference,
+    )
+
+    if not has_reference:
+        await SendMessage(
+            chat_id=message.chat.id,
+            text="Пожалуйста, сначала выберете загрузку эталонного решения",
+            context=ContextIO.UserFailed,
+        )
+        return
+
+    if not _IsArchive(message.document):
         await SendMessage(
             chat_id=message.chat.id,
-            text="❌ Не удалось найти отчет по проверке. Попробуйте загрузить решение еще раз.",
-            context=ContextIO.Error,
+            text="❌ Нужен архив в формате .zip. Пожалуйста, попробуйте еще раз",
+            context=ContextIO.UserFailed,
         )
-        await state.clear()
         return
+    assert message.document is not None
 
-    await SendDocument(
+    if await _RejectIfBusy(message.chat.id):
+        return
+
+    _EnsureNotebookDirectories(message.chat.id)
+    await _SaveNotebook(
+        document=message.document,
+        destination=DIR_NOTEBOOKS
+        / f"notebook_{message.chat.id}"
+        / "batch"
+        / ARCHIVE_NAME,
+    )
+
+    await SendMessage(
         chat_id=message.chat.id,
-        document=types.FSInputFile(result_path),
-        caption="📄 Отчет по проверке",
+        text="✅ Архив решений загружен, приступаем к оценке",
         reply_markup=ipynb_keyboard,
     )
+
+    a = DIR_NOTEBOOKS / f"notebook_{message.chat.id}"
+
+    await SubmitBatchGrading(message.chat.id, a)
+
     await state.clear()
@@ -1,10 +1,11 @@
 from aiogram import Dispatcher
 
-from grader.bot.handlers.client.commands import start
+from grader.bot.handlers.client.commands import pdf, start
 
 
 def RegisterClientHandlers(dp: Dispatcher) -> None:
     dp.include_routers(
         # order matters
+        pdf.router,  # before the upload states, which take any message
         start.router,
     )
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from grader.db.models.grading_job import GradingJobKind
+from grader.services.grading_job import GradingJobService
+
+# caption of a reference upload that forces re-deriving its task structure
+FORCE_CAPTION = "заново"
+# command that turns PDF reports of single submissions off and on
+PDF_COMMAND = "pdf"
+
+
+async def IsChatBusy(chat_id: int) -> bool:
+    """
+    A chat with a queued or running job must not overwrite its notebook directory.
+    """
+    return await GradingJobService.Create().HasUnfinishedJobs(chat_id)
+
+
+async def SubmitReferenceProcessing(
+    chat_id: int,
+    directory_path: Path,
+    force: bool = False,
+) -> None:
+    await GradingJobService.Create().CreateJob(
+        chat_id=chat_id,
+        kind=GradingJobKind.reference,
+        directory=str(directory_path),
+        force=force,
+    )
+
+
+async def SubmitStudentGrading(
+    chat_id: int,
+    directory_path: Path,
+    file_name: str,
+) -> None:
+    await GradingJobService.Create().CreateJob(
+        chat_id=chat_id,
+        kind=GradingJobKind.student,
+        directory=str(directory_path),
+        file_name=file_name,
+    )
+
+
+async def SubmitBatchGrading(chat_id: int, directory_path: Path) -> None:
+    await GradingJobService.Create().CreateJob(
+        chat_id=chat_id,
+        kind=GradingJobKind.batch,
+        directory=str(directory_path),
+    )
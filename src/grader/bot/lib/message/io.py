@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
 
@@ -153,6 +154,68 @@ async def SendMessage(
     return message
 
 
+# Telegram allows about one message edit per second in a chat;
+# limiters of the least recently edited chats are dropped past the bound
+_EDIT_LIMITERS_MAX = 1024
+_edit_limiters: OrderedDict[int, AsyncLimiter] = OrderedDict()
+
+
+def _EditLimiter(chat_id: int) -> AsyncLimiter:
+    limiter = _edit_limiters.pop(chat_id, None) or AsyncLimiter(
+        max_rate=1, time_period=1
+    )
+    _edit_limiters[chat_id] = limiter
+
+    if len(_edit_limiters) > _EDIT_LIMITERS_MAX:
+        _edit_limiters.popitem(last=False)
+
+    return limiter
+
+
+async def EditMessage(
+    chat_id: int,
+    message_id: int,
+    text: str,
+    context: ContextIO = ContextIO.No,
+) -> types.Message | bool | None:
+    """
+    Edits the text of a sent message, pacing edits to at most one per second
+    per chat. Edits that do not change the text are not an error.
+    """
+    add = ContextIO.No
+    limiter = _EditLimiter(chat_id)
+
+    result: types.Message | bool | None = None
+    try:
+        async with limiter:
+            result = await bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=message_id,
+                text=text,
+            )
+
+    except TelegramForbiddenError:
+        add = ContextIO.ForbiddenError
+        await UserBlockedBot(chat_id)
+
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            logging.error(e)
+            add = ContextIO.BadRequest
+
+    except TelegramNetworkError as e:
+        logging.error(e)
+        add = ContextIO.NetworkError
+
+    part = await GetChatUserLoggingPart(chat_id)
+    logging.info(
+        f"{part} {SignIO.Out.value}{add.value}{context.value} "
+        f"Message(message_id={message_id}) edited: {repr(text)}"
+    )
+
+    return result
+
+
 @dataclass
 class PersonalMsg:
     chat_id: int
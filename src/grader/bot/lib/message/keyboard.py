@@ -0,0 +1,14 @@
+from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
+
+ipynb_keyboard = ReplyKeyboardMarkup(
+    keyboard=[
+        [
+            KeyboardButton(text="📥 Эталон"),
+            KeyboardButton(text="🔍 Студент"),
+        ],
+        [
+            KeyboardButton(text="📦 Архив студентов"),
+        ],
+    ],
+    resize_keyboard=True,
+)
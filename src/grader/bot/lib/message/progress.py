@@ -0,0 +1,70 @@
+import asyncio
+from collections.abc import Callable
+
+from grader.bot.lib.message.io import EditMessage, SendMessage
+
+
+class ProgressMessage:
+    """
+    One chat message edited in place while a long job advances.
+    `Report` may be called from grading threads; updates are coalesced,
+    so a slow Telegram edit never queues up stale states.
+    """
+
+    def __init__(self, chat_id: int, render: Callable[[int, int], str]):
+        self._chat_id = chat_id
+        self._render = render
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._message_id: int | None = None
+        self._shown: str | None = None
+        self._latest: str | None = None
+        self._flush: asyncio.Task[None] | None = None
+
+    async def Start(self, text: str) -> None:
+        self._loop = asyncio.get_running_loop()
+
+        message = await SendMessage(chat_id=self._chat_id, text=text)
+        if message is not None:
+            self._message_id = message.message_id
+            self._shown = text
+
+    def Report(self, done: int, total: int) -> None:
+        """
+        Thread-safe: schedules an edit to `render(done, total)` on the event loop.
+        """
+        if self._loop is None:
+            return
+
+        self._loop.call_soon_threadsafe(self._Schedule, self._render(done, total))
+
+    def Update(self, done: int, total: int) -> None:
+        self._Schedule(self._render(done, total))
+
+    async def Finish(self) -> None:
+        """
+        Waits until the latest reported state is shown.
+        """
+        if self._flush is not None:
+            await self._flush
+
+    def _Schedule(self, text: str) -> None:
+        if self._message_id is None:  # the initial message was not delivered
+            return
+
+        self._latest = text
+
+        if self._flush is None or self._flush.done():
+            self._flush = asyncio.create_task(self._Flush())
+
+    async def _Flush(self) -> None:
+        assert self._message_id is not None
+
+        while self._latest is not None and self._latest != self._shown:
+            text = self._latest
+            await EditMessage(
+                chat_id=self._chat_id,
+                message_id=self._message_id,
+                text=text,
+            )
+            self._shown = text
@@ -1,5 +1,6 @@
 from aiogram.types import BotCommand
 
+from grader.bot.lib.grading.jobs import PDF_COMMAND
 from grader.bot.lifecycle.creator import bot
 
 
@@ -7,6 +8,7 @@ async def SetMenu() -> None:
     commands = [
         BotCommand(command="/start", description="Меню"),
         BotCommand(command="/cancel", description="Отменить действие"),
+        BotCommand(command=f"/{PDF_COMMAND}", description="PDF-отчеты: вкл/выкл"),
     ]
 
     await bot.set_my_commands(commands)
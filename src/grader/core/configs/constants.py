@@ -1 +1,3 @@
 ADMIN_CHAT_IDS = [749410326]
+
+GRADING_JOBS_CHANNEL = "grading_jobs"
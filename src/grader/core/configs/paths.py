@@ -7,18 +7,27 @@ _DIR_PROMPTS = _DIR_ROOT / "prompts"
 
 DIR_TEMP = _DIR_DATA / "temp"
 DIR_NOTEBOOKS = _DIR_DATA / "notebooks"
+DIR_CACHE = _DIR_DATA / "cache"
+DIR_REFERENCES = _DIR_DATA / "references"
 
 _dirs = [
     _DIR_DATA,
     _DIR_LOGS,
+    _DIR_LOGS / "worker",
     DIR_TEMP,
     DIR_NOTEBOOKS,
+    DIR_CACHE,
+    DIR_REFERENCES,
 ]
 
 PATH_ENV = _DIR_ROOT / ".env"
 PATH_BOT_LOGS = _DIR_LOGS / "bot" / "bot.log"
+PATH_WORKER_LOGS = _DIR_LOGS / "worker" / "worker.log"
 PATH_STRUCTURE_PROMPT = _DIR_PROMPTS / "structure.md"
 PATH_GRADER_PROMPT = _DIR_PROMPTS / "grader.md"
+PATH_GRADER_CONTEXT_PROMPT = _DIR_PROMPTS / "grader_context.md"
+PATH_GRADER_INPUT_PROMPT = _DIR_PROMPTS / "grader_input.md"
+PATH_GRADER_SHARD_PROMPT = _DIR_PROMPTS / "grader_shard.md"
 
 
 def EnsurePaths() -> None:
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -17,6 +19,107 @@ class Settings(BaseSettings):
     # OPENAI_API_KEY: SecretStr
     OPENROUTER_API_KEY: SecretStr
 
+    # shared OpenRouter client
+    OPENROUTER_BASE_URL: str = (
+        "https://openrouter.ai/api/v1"  # or `python -m grader.mock`
+    )
+    OPENROUTER_MAX_CONNECTIONS: int = 20
+    OPENROUTER_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OPENROUTER_KEEPALIVE_EXPIRY_SECONDS: float = 60
+    OPENROUTER_TIMEOUT_SECONDS: float = 300
+    OPENROUTER_CONNECT_TIMEOUT_SECONDS: float = 10
+
+    # OpenRouter models in fallback order, retries and circuit breakers
+    OPENROUTER_MODELS: list[str] = ["deepseek/deepseek-v3.2"]
+    OPENROUTER_RETRY_ATTEMPTS: int = 3  # per model
+    OPENROUTER_BACKOFF_BASE_SECONDS: float = 1
+    OPENROUTER_BACKOFF_MAX_SECONDS: float = 30
+    OPENROUTER_BREAKER_FAILURES: int = 5
+    OPENROUTER_BREAKER_RESET_SECONDS: float = 60
+
+    # hedging: duplicate grading requests slower than recent latencies
+    OPENROUTER_HEDGE_ENABLED: bool = False
+    OPENROUTER_HEDGE_PERCENTILE: float = 95
+    OPENROUTER_HEDGE_WINDOW: int = 200
+    OPENROUTER_HEDGE_MIN_SAMPLES: int = 20
+    OPENROUTER_HEDGE_MODELS: list[str] = []  # empty: same as OPENROUTER_MODELS
+
+    # grading executor
+    GRADING_EXECUTOR: Literal["thread", "process"] = "thread"
+    GRADING_MAX_CONCURRENCY: int = 4
+
+    # PDF reports: a process pool with warm WeasyPrint workers
+    GRADING_REPORT_WORKERS: int = 2
+
+    # execute submissions that have no outputs, on pre-started Jupyter kernels
+    GRADING_EXECUTE_NOTEBOOKS: bool = False
+    GRADING_EXECUTE_KERNELS: int = 2  # warm kernels, and notebooks executed at once
+    GRADING_EXECUTE_KERNEL_NAME: str = "python3"
+    GRADING_EXECUTE_CELL_SECONDS: int = 60
+    GRADING_EXECUTE_TOTAL_SECONDS: int = 300
+    GRADING_EXECUTE_MEMORY_MB: int = 2048
+    GRADING_EXECUTE_USER: str = "grader-kernel"  # unprivileged, kernels run as it
+
+    # grading job queue
+    GRADING_BOT_RUNS_WORKER: bool = True  # otherwise only `python -m grader worker`
+    GRADING_JOB_LEASE_SECONDS: int = 900
+    GRADING_JOB_MAX_ATTEMPTS: int = 3
+    GRADING_WORKER_POLL_SECONDS: int = 30
+
+    # batch grading
+    GRADING_BATCH_CONCURRENCY: int = 8
+    GRADING_BATCH_MAX_FILES: int = 500
+    GRADING_BATCH_MAX_FILE_MB: int = 50  # uncompressed, per notebook
+    GRADING_BATCH_MAX_ARCHIVE_MB: int = 1024  # uncompressed, all notebooks
+    OPENROUTER_MAX_REQUESTS_PER_MINUTE: int = 60
+
+    # write every LLM request to `llm_calls`
+    GRADING_RECORD_LLM_CALLS: bool = True
+
+    # stream LLM responses to report per-task progress in the chat
+    GRADING_STREAM: bool = True
+
+    # grading result cache
+    GRADING_CACHE_ENABLED: bool = True
+    GRADING_CACHE_TTL_SECONDS: int = 30 * 24 * 60 * 60
+    GRADING_CACHE_MAX_ENTRIES: int = 10_000
+
+    # send only student cells that differ from the reference
+    GRADING_ALIGN_CELLS: bool = True
+
+    # send only the student cells relevant to the tasks (BM25 over cells);
+    # notebooks with fewer candidate cells are sent whole
+    GRADING_RELEVANCE: bool = False
+    GRADING_RELEVANCE_TOP_K: int = 6
+    GRADING_RELEVANCE_TASK_CHARS: int = 12_000
+    GRADING_RELEVANCE_MIN_CELLS: int = 30
+
+    # tasks whose printed numbers match the reference are graded without the LLM
+    GRADING_NUMERIC_CHECK: bool = False  # opt-in: a match scores full marks
+    GRADING_NUMERIC_RTOL: float = 1e-3
+    GRADING_NUMERIC_ATOL: float = 1e-6
+
+    # a resubmission re-grades only the tasks whose cells changed
+    GRADING_INCREMENTAL: bool = False  # opt-in: matched by chat and file name
+
+    # write embedded notebook images to disk (the LLM only sees their names)
+    GRADING_EXTRACT_IMAGES: bool = True
+    GRADING_IMAGE_WRITERS: int = 4
+
+    # also write a submission's `hw.json`, `hw_llm.txt` and `hw_llm_aligned.txt` (debugging)
+    GRADING_KEEP_INTERMEDIATE_FILES: bool = False
+
+    # sharded grading: one LLM request per task
+    GRADING_SHARDED: bool = False
+    GRADING_SHARD_CONCURRENCY: int = 4
+
+    # cell output limits for the LLM text
+    OUTPUT_LIMIT_HEAD_LINES: int = 40
+    OUTPUT_LIMIT_TAIL_LINES: int = 20
+    OUTPUT_LIMIT_LINE_CHARS: int = 500
+    OUTPUT_LIMIT_CELL_CHARS: int = 6_000
+    OUTPUT_LIMIT_NOTEBOOK_CHARS: int = 60_000
+
     model_config = SettingsConfigDict(env_file=PATH_ENV, env_file_encoding="utf-8")
 
 
@@ -0,0 +1,28 @@
+import logging
+from logging.handlers import QueueListener
+
+from grader.core.configs.paths import PATH_WORKER_LOGS
+from grader.core.logs.settings import (
+    CreateConsoleHandler,
+    CreateFileHandler,
+    CreateListener,
+    FilterOutLogs,
+)
+
+
+async def LoggerSetup() -> QueueListener:
+    console_handler = CreateConsoleHandler(
+        logging.INFO,
+        filters=[
+            FilterOutLogs("sqlalchemy.engine", logging.WARNING),
+            FilterOutLogs("aiogram", logging.WARNING),
+        ],
+    )
+    worker_file_handler = CreateFileHandler(
+        PATH_WORKER_LOGS,
+        logging.DEBUG,
+    )
+
+    listener: QueueListener = CreateListener(console_handler, worker_file_handler)
+
+    return listener
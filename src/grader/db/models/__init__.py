@@ -1 +1,4 @@
+from .grading_job import GradingJob  # noqa: F401
+from .llm_call import LLMCall  # noqa: F401
+from .submission import Submission  # noqa: F401
 from .user import User  # noqa: F401
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import StrEnum
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Enum as SQLEnum,
+    Float,
+    Integer,
+    Text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from grader.db.base import Base
+from grader.db.models.common.time import TimestampMixin
+
+
+class GradingJobKind(StrEnum):
+    reference = "reference"
+    student = "student"
+    batch = "batch"
+
+
+class GradingJobStatus(StrEnum):
+    queued = "queued"
+    converting = "converting"
+    grading = "grading"
+    rendering = "rendering"
+    done = "done"
+    failed = "failed"
+
+
+ACTIVE_JOB_STATUSES = (
+    GradingJobStatus.converting,
+    GradingJobStatus.grading,
+    GradingJobStatus.rendering,
+)
+
+
+class GradingJob(Base, TimestampMixin):
+    __tablename__ = "grading_jobs"
+
+    # --- primary key ---
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
+
+    # --- secondary keys ---
+    chat_id: Mapped[int] = mapped_column(
+        BigInteger,
+        index=True,
+        nullable=False,
+    )
+
+    # --- payload ---
+    kind: Mapped[GradingJobKind] = mapped_column(
+        SQLEnum(GradingJobKind, name="grading_job_kind"),
+        nullable=False,
+    )
+    directory: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,
+    )
+    force: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        nullable=False,
+    )
+    file_name: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+    )
+
+    # --- state ---
+    status: Mapped[GradingJobStatus] = mapped_column(
+        SQLEnum(GradingJobStatus, name="grading_job_status"),
+        index=True,
+        default=GradingJobStatus.queued,
+        nullable=False,
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    error: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+    )
+    execution_seconds: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+
+    # --- claim ---
+    worker_id: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+    )
+    locked_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from enum import StrEnum
+
+from sqlalchemy import BigInteger, Enum as SQLEnum, Float, Integer, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from grader.db.base import Base
+from grader.db.models.common.time import TimestampMixin
+
+
+class LLMCallStage(StrEnum):
+    structure = "structure"
+    grade = "grade"
+
+
+class LLMCallStatus(StrEnum):
+    ok = "ok"
+    error = "error"
+    cancelled = "cancelled"
+
+
+class LLMCall(Base, TimestampMixin):
+    """
+    One request to OpenRouter, including failed, retried and cancelled (hedged) ones.
+    """
+
+    __tablename__ = "llm_calls"
+
+    # --- primary key ---
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
+
+    # --- secondary keys ---
+    chat_id: Mapped[int | None] = mapped_column(
+        BigInteger,
+        index=True,
+        nullable=True,
+    )
+    job_id: Mapped[int | None] = mapped_column(
+        BigInteger,
+        index=True,
+        nullable=True,
+    )
+    submission: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+    )
+
+    # --- request ---
+    stage: Mapped[LLMCallStage] = mapped_column(
+        SQLEnum(LLMCallStage, name="llm_call_stage"),
+        nullable=False,
+    )
+    model: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,
+    )
+
+    # --- usage ---
+    input_tokens: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    cached_tokens: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    output_tokens: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    cost: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        nullable=False,
+    )
+    latency: Mapped[float] = mapped_column(
+        Float,
+        nullable=False,
+    )
+
+    # --- outcome ---
+    status: Mapped[LLMCallStatus] = mapped_column(
+        SQLEnum(LLMCallStatus, name="llm_call_status"),
+        index=True,
+        nullable=False,
+    )
+    error: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+    )
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import BigInteger, Integer, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from grader.db.base import Base
+from grader.db.models.common.time import TimestampMixin
+
+
+class Submission(Base, TimestampMixin):
+    """
+    One graded student notebook of a chat: what its cells looked like and the
+    per-task results, so a resubmission of the same file re-grades only the tasks
+    that changed.
+    """
+
+    __tablename__ = "submissions"
+
+    # --- primary key ---
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
+
+    # --- secondary keys ---
+    chat_id: Mapped[int] = mapped_column(
+        BigInteger,
+        index=True,
+        nullable=False,
+    )
+    job_id: Mapped[int | None] = mapped_column(
+        BigInteger,
+        nullable=True,
+    )
+    reference_hash: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,
+    )
+    file_name: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+    )
+
+    # --- payload ---
+    fingerprints: Mapped[dict[str, str]] = mapped_column(
+        JSONB,
+        nullable=False,
+    )
+    results: Mapped[dict[str, Any]] = mapped_column(
+        JSONB,
+        nullable=False,
+    )
+
+    # --- stats ---
+    reused_tasks: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    graded_tasks: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
@@ -45,3 +45,11 @@ class User(Base, TimestampMixin):
         default=False,
         nullable=False,
     )
+
+    # --- preferences ---
+    # None for users created before the column existed: the PDF is sent
+    send_pdf: Mapped[bool | None] = mapped_column(
+        Boolean,
+        default=True,
+        nullable=True,
+    )
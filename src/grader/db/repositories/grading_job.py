@@ -0,0 +1,221 @@
+import logging
+from datetime import timedelta
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from grader.core.configs.constants import GRADING_JOBS_CHANNEL
+from grader.db.models.common.time import utcnow
+from grader.db.models.grading_job import (
+    ACTIVE_JOB_STATUSES,
+    GradingJob,
+    GradingJobKind,
+    GradingJobStatus,
+)
+
+_LEASE_EXPIRED = "Worker lease expired too many times."
+
+
+class JobLeaseLostError(RuntimeError):
+    """
+    The job was requeued or failed as stale and is no longer held by the worker.
+    """
+
+
+class GradingJobRepository:
+    def __init__(self, session: async_sessionmaker[AsyncSession]):
+        self.session = session
+
+    # --- Create ---
+    async def CreateJob(
+        self,
+        chat_id: int,
+        kind: GradingJobKind,
+        directory: str,
+        force: bool = False,
+        file_name: str | None = None,
+    ) -> int:
+        """
+        Inserts a queued job and wakes up listening workers in the same transaction,
+        so the notification is delivered only once the job is visible.
+        """
+        async with self.session() as session:
+            job = GradingJob(
+                chat_id=chat_id,
+                kind=kind,
+                directory=directory,
+                force=force,
+                file_name=file_name,
+            )
+            session.add(job)
+            await session.flush()
+
+            await session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": GRADING_JOBS_CHANNEL, "payload": str(job.id)},
+            )
+
+            await session.commit()
+            logging.info(
+                f"GradingJob(id={job.id}, chat_id={chat_id}, kind={kind.value}) queued."
+            )
+
+            return job.id
+
+    # --- Read ---
+    async def GetJob(self, job_id: int) -> GradingJob | None:
+        async with self.session() as session:
+            return await session.get(GradingJob, job_id)
+
+    async def CountUnfinishedJobs(self, chat_id: int) -> int:
+        async with self.session() as session:
+            result = await session.execute(
+                select(func.count())
+                .select_from(GradingJob)
+                .where(
+                    GradingJob.chat_id == chat_id,
+                    GradingJob.status.in_(
+                        (GradingJobStatus.queued, *ACTIVE_JOB_STATUSES)
+                    ),
+                )
+            )
+
+            return int(result.scalar_one())
+
+    # --- Update ---
+    async def ClaimJob(self, worker_id: str) -> GradingJob | None:
+        """
+        Atomically takes the oldest queued job. Concurrent workers skip rows
+        that are already locked instead of waiting on them.
+        """
+        async with self.session() as session:
+            result = await session.execute(
+                select(GradingJob)
+                .where(GradingJob.status == GradingJobStatus.queued)
+                .order_by(GradingJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = result.scalar_one_or_none()
+
+            if job is None:
+                return None
+
+            job.status = GradingJobStatus.converting
+            job.worker_id = worker_id
+            job.locked_at = utcnow()
+            job.attempts += 1
+
+            await session.commit()
+            logging.info(
+                f"GradingJob(id={job.id}) claimed by worker '{worker_id}', attempt {job.attempts}."
+            )
+
+            return job
+
+    async def UpdateStatus(
+        self,
+        job_id: int,
+        worker_id: str | None,
+        status: GradingJobStatus,
+        error: str | None = None,
+    ) -> None:
+        """
+        Raises `JobLeaseLostError` if the job is no longer held by `worker_id`.
+        """
+        async with self.session() as session:
+            result = await session.execute(
+                update(GradingJob)
+                .where(GradingJob.id == job_id, GradingJob.worker_id == worker_id)
+                .values(status=status, error=error, locked_at=utcnow())
+            )
+
+            if result.rowcount == 0:
+                logging.error(
+                    f"Failed to update: 'status={status.value}'. GradingJob(id={job_id}) is not held by worker '{worker_id}'."
+                )
+                raise JobLeaseLostError()
+
+            await session.commit()
+            logging.info(f"GradingJob(id={job_id}) updated: 'status={status.value}'.")
+
+    async def SetExecutionSeconds(self, job_id: int, seconds: float) -> None:
+        async with self.session() as session:
+            await session.execute(
+                update(GradingJob)
+                .where(GradingJob.id == job_id)
+                .values(execution_seconds=seconds)
+            )
+            await session.commit()
+
+    async def TouchJob(self, job_id: int, worker_id: str | None) -> bool:
+        """
+        Extends the lease of a long-running job, so it is not requeued as stale.
+        Returns False if the job is no longer held by `worker_id`.
+        """
+        async with self.session() as session:
+            result = await session.execute(
+                update(GradingJob)
+                .where(
+                    GradingJob.id == job_id,
+                    GradingJob.worker_id == worker_id,
+                    GradingJob.status.in_(ACTIVE_JOB_STATUSES),
+                )
+                .values(locked_at=utcnow())
+            )
+            await session.commit()
+
+            return bool(result.rowcount)
+
+    async def FailExpiredJobs(
+        self, lease: timedelta, max_attempts: int
+    ) -> list[tuple[int, GradingJobKind]]:
+        """
+        Fails stale jobs that have already used up their attempts.
+        Returns their (chat_id, kind), for the chats to be told.
+        """
+        async with self.session() as session:
+            result = await session.execute(
+                update(GradingJob)
+                .where(
+                    GradingJob.status.in_(ACTIVE_JOB_STATUSES),
+                    GradingJob.locked_at < utcnow() - lease,
+                    GradingJob.attempts >= max_attempts,
+                )
+                .values(
+                    status=GradingJobStatus.failed,
+                    error=_LEASE_EXPIRED,
+                    worker_id=None,
+                )
+                .returning(GradingJob.id, GradingJob.chat_id, GradingJob.kind)
+            )
+            failed = result.all()
+
+            await session.commit()
+
+        for job_id, _, _ in failed:
+            logging.warning(f"GradingJob(id={job_id}) failed: {_LEASE_EXPIRED}")
+
+        return [(chat_id, kind) for _, chat_id, kind in failed]
+
+    async def RequeueStaleJobs(self, lease: timedelta) -> int:
+        """
+        Returns jobs held by crashed or restarted workers back to the queue.
+        Run after `FailExpiredJobs`, so jobs out of attempts are not retried.
+        """
+        async with self.session() as session:
+            requeued = await session.execute(
+                update(GradingJob)
+                .where(
+                    GradingJob.status.in_(ACTIVE_JOB_STATUSES),
+                    GradingJob.locked_at < utcnow() - lease,
+                )
+                .values(status=GradingJobStatus.queued, worker_id=None)
+            )
+
+            await session.commit()
+
+        if requeued.rowcount:
+            logging.warning(f"Stale grading jobs requeued: {requeued.rowcount}.")
+
+        return int(requeued.rowcount)
@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import Date, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+
+from grader.db.models.llm_call import LLMCall, LLMCallStage, LLMCallStatus
+
+
+@dataclass
+class LatencyRow:
+    stage: LLMCallStage
+    model: str
+    calls: int
+    p50: float
+    p95: float
+
+
+@dataclass
+class SubmissionTokensRow:
+    submissions: int
+    input_tokens: float
+    cached_tokens: float
+    output_tokens: float
+    cost: float
+
+
+@dataclass
+class SpendRow:
+    key: date | int | None  # day or chat_id
+    calls: int
+    tokens: int
+    cost: float
+
+
+class LLMCallRepository:
+    def __init__(self, session: async_sessionmaker[AsyncSession]):
+        self.session = session
+
+    # --- Create ---
+    async def CreateCall(self, call: LLMCall) -> None:
+        async with self.session() as session:
+            session.add(call)
+            await session.commit()
+
+    # --- Read ---
+    async def GetLatencyPercentiles(self, since: datetime) -> list[LatencyRow]:
+        """
+        p50/p95 latency of successful calls per stage and model.
+        """
+        async with self.session() as session:
+            result = await session.execute(
+                select(
+                    LLMCall.stage,
+                    LLMCall.model,
+                    func.count(),
+                    func.percentile_cont(0.5).within_group(LLMCall.latency),
+                    func.percentile_cont(0.95).within_group(LLMCall.latency),
+                )
+                .where(
+                    LLMCall.created_at >= since,
+                    LLMCall.status == LLMCallStatus.ok,
+                )
+                .group_by(LLMCall.stage, LLMCall.model)
+                .order_by(LLMCall.stage, func.count().desc())
+            )
+
+            return [LatencyRow(*row) for row in result.all()]
+
+    async def GetTokensPerSubmission(self, since: datetime) -> SubmissionTokensRow:
+        """
+        Average grading usage per submission, including retries and hedges.
+        """
+        per_submission = (
+            select(
+                func.sum(LLMCall.input_tokens).label("input_tokens"),
+                func.sum(LLMCall.cached_tokens).label("cached_tokens"),
+                func.sum(LLMCall.output_tokens).label("output_tokens"),
+                func.sum(LLMCall.cost).label("cost"),
+            )
+            .where(
+                LLMCall.created_at >= since,
+                LLMCall.stage == LLMCallStage.grade,
+            )
+            .group_by(LLMCall.job_id, LLMCall.submission)
+            .subquery()
+        )
+
+        async with self.session() as session:
+            result = await session.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.avg(per_submission.c.input_tokens), 0),
+                    func.coalesce(func.avg(per_submission.c.cached_tokens), 0),
+                    func.coalesce(func.avg(per_submission.c.output_tokens), 0),
+                    func.coalesce(func.avg(per_submission.c.cost), 0),
+                )
+            )
+
+            return SubmissionTokensRow(*result.one())
+
+    async def GetSpendPerDay(self, since: datetime) -> list[SpendRow]:
+        return await self._GetSpend(since, cast(LLMCall.created_at, Date))
+
+    async def GetSpendPerUser(self, since: datetime, limit: int) -> list[SpendRow]:
+        """
+        The `limit` chats with the highest spend (or token usage, if no cost reported).
+        """
+        return await self._GetSpend(since, LLMCall.chat_id, top=limit)
+
+    async def _GetSpend(
+        self,
+        since: datetime,
+        key: ColumnElement[Any] | InstrumentedAttribute[Any],
+        top: int | None = None,
+    ) -> list[SpendRow]:
+        tokens = func.sum(LLMCall.input_tokens + LLMCall.output_tokens)
+        cost = func.sum(LLMCall.cost)
+
+        query = (
+            select(key, func.count(), tokens, cost)
+            .where(LLMCall.created_at >= since)
+            .group_by(key)
+        )
+        if top is None:
+            query = query.order_by(key)
+        else:
+            query = query.order_by(cost.desc(), tokens.desc()).limit(top)
+
+        async with self.session() as session:
+            result = await session.execute(query)
+
+            return [SpendRow(*row) for row in result.all()]
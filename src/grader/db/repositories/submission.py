@@ -0,0 +1,37 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from grader.db.models.submission import Submission
+
+
+class SubmissionRepository:
+    def __init__(self, session: async_sessionmaker[AsyncSession]):
+        self.session = session
+
+    # --- Create ---
+    async def CreateSubmission(self, submission: Submission) -> None:
+        async with self.session() as session:
+            session.add(submission)
+            await session.commit()
+
+    # --- Read ---
+    async def GetLatestSubmission(
+        self, chat_id: int, file_name: str, reference_hash: str
+    ) -> Submission | None:
+        """
+        The chat's last graded submission of the same file name against the same
+        processed reference.
+        """
+        async with self.session() as session:
+            result = await session.execute(
+                select(Submission)
+                .where(
+                    Submission.chat_id == chat_id,
+                    Submission.file_name == file_name,
+                    Submission.reference_hash == reference_hash,
+                )
+                .order_by(Submission.id.desc())
+                .limit(1)
+            )
+
+            return result.scalar_one_or_none()
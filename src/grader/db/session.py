@@ -1,5 +1,7 @@
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+import grader.db.models  # noqa: F401  # registers mapped tables in Base.metadata
 from grader.core.configs.settings import settings
 from grader.db.base import Base
 
@@ -8,6 +10,14 @@ engine = create_async_engine(
     echo=False,
 )
 
+# columns added to tables that already exist, which `create_all` leaves as they are
+_ADDED_COLUMNS = (
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS send_pdf BOOLEAN",
+    "ALTER TABLE grading_jobs ADD COLUMN IF NOT EXISTS execution_seconds DOUBLE PRECISION",
+    "ALTER TABLE grading_jobs ADD COLUMN IF NOT EXISTS file_name TEXT",
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS file_name TEXT",
+)
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     expire_on_commit=False,
@@ -17,7 +27,11 @@ AsyncSessionLocal = async_sessionmaker(
 
 async def EnsureDB() -> None:
     """
-    Create all SQLAlchemy-mapped tables in the database if they don't already exist.
+    Create all SQLAlchemy-mapped tables in the database if they don't already exist,
+    and add the columns introduced since to existing ones.
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+        for statement in _ADDED_COLUMNS:
+            await conn.execute(text(statement))
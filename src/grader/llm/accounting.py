@@ -0,0 +1,66 @@
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+
+from grader.core.configs.settings import settings
+from grader.db.models.llm_call import LLMCall, LLMCallStage, LLMCallStatus
+from grader.llm.usage import LLMUsage
+from grader.services.llm_call import LLMCallService
+
+
+@dataclass(frozen=True)
+class LLMCallOwner:
+    chat_id: int | None = None
+    job_id: int | None = None
+    submission: str | None = None  # batch member name
+
+
+# set by the worker for each job (and by batches for each submission);
+# asyncio tasks inherit it, so LLM calls deep in the pipeline know whom they serve
+llm_call_owner: ContextVar[LLMCallOwner | None] = ContextVar(
+    "llm_call_owner", default=None
+)
+
+
+def SetSubmission(submission: str) -> None:
+    if not settings.GRADING_RECORD_LLM_CALLS:
+        return
+
+    owner = llm_call_owner.get() or LLMCallOwner()
+    llm_call_owner.set(replace(owner, submission=submission))
+
+
+async def RecordLLMCall(
+    stage: LLMCallStage,
+    model: str,
+    status: LLMCallStatus,
+    usage: LLMUsage,
+    error: str | None = None,
+) -> None:
+    """
+    Writes one `llm_calls` row. Accounting never fails the grading itself.
+    """
+    if not settings.GRADING_RECORD_LLM_CALLS:
+        return
+
+    owner = llm_call_owner.get() or LLMCallOwner()
+
+    try:
+        await LLMCallService.Create().CreateCall(
+            LLMCall(
+                chat_id=owner.chat_id,
+                job_id=owner.job_id,
+                submission=owner.submission,
+                stage=stage,
+                model=model,
+                input_tokens=usage.input_tokens,
+                cached_tokens=usage.cached_tokens,
+                output_tokens=usage.output_tokens,
+                cost=usage.cost,
+                latency=usage.latency,
+                status=status,
+                error=error,
+            )
+        )
+    except Exception:
+        logging.exception(f"Failed to record LLM call: {stage.value} via '{model}'.")
@@ -0,0 +1,232 @@
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+
+from grader.llm.convert import NotebookCell, ParsedNotebook, RenderCellText
+
+# below this source similarity a student cell is treated as added, not modified
+_MIN_SIMILARITY = 0.5
+# larger gaps are not paired cell by cell (quadratic cost), only marked added/missing
+_MAX_GAP_PAIRS = 40_000
+
+
+@dataclass
+class CellMatch:
+    student: int | None
+    reference: int | None
+    identical: bool = False
+
+
+def _NormalizeSource(cell: NotebookCell) -> str:
+    lines = (" ".join(line.split()) for line in cell.source.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def CellKey(cell: NotebookCell) -> tuple[str, str, tuple[str, ...]]:
+    outputs = tuple(" ".join(str(text).split()) for text in cell.output_texts)
+    return (cell.cell_type, _NormalizeSource(cell), outputs)
+
+
+def _Similarity(a: str, b: str) -> float:
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    if matcher.real_quick_ratio() < _MIN_SIMILARITY:
+        return 0.0
+    if matcher.quick_ratio() < _MIN_SIMILARITY:
+        return 0.0
+    return matcher.ratio()
+
+
+def _AlignGap(
+    reference: list[str],
+    student: list[str],
+    reference_offset: int,
+    student_offset: int,
+) -> list[CellMatch]:
+    """
+    Needleman-Wunsch over a gap between identical blocks: pairs cells to maximize
+    total source similarity, keeping order; unpaired cells are added/missing.
+    """
+    n, m = len(reference), len(student)
+    if n * m > _MAX_GAP_PAIRS:
+        return [
+            *(CellMatch(None, reference_offset + k) for k in range(n)),
+            *(CellMatch(student_offset + k, None) for k in range(m)),
+        ]
+
+    similarity = [[_Similarity(a, b) for b in student] for a in reference]
+
+    score = [[0.0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        for j in range(m - 1, -1, -1):
+            pair = similarity[i][j]
+            score[i][j] = max(
+                score[i + 1][j],
+                score[i][j + 1],
+                score[i + 1][j + 1] + pair if pair >= _MIN_SIMILARITY else 0.0,
+            )
+
+    matches: list[CellMatch] = []
+    i = j = 0
+    while i < n and j < m:
+        pair = similarity[i][j]
+        if pair >= _MIN_SIMILARITY and score[i][j] == score[i + 1][j + 1] + pair:
+            matches.append(CellMatch(student_offset + j, reference_offset + i))
+            i, j = i + 1, j + 1
+        elif score[i][j] == score[i + 1][j]:
+            matches.append(CellMatch(None, reference_offset + i))
+            i += 1
+        else:
+            matches.append(CellMatch(student_offset + j, None))
+            j += 1
+
+    matches.extend(CellMatch(None, reference_offset + k) for k in range(i, n))
+    matches.extend(CellMatch(student_offset + k, None) for k in range(j, m))
+
+    return matches
+
+
+def AlignCells(
+    reference_cells: list[NotebookCell],
+    student_cells: list[NotebookCell],
+) -> list[CellMatch]:
+    """
+    Aligns student cells to reference cells. Runs of identical cells (same type,
+    normalized source and outputs) are anchored first; the gaps between them are
+    aligned by source similarity.
+    """
+    reference_keys = [CellKey(cell) for cell in reference_cells]
+    student_keys = [CellKey(cell) for cell in student_cells]
+
+    matcher = SequenceMatcher(None, reference_keys, student_keys, autojunk=False)
+    matches: list[CellMatch] = []
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            matches.extend(
+                CellMatch(j1 + k, i1 + k, identical=True) for k in range(i2 - i1)
+            )
+            continue
+
+        matches.extend(
+            _AlignGap(
+                [key[1] for key in reference_keys[i1:i2]],
+                [key[1] for key in student_keys[j1:j2]],
+                reference_offset=i1,
+                student_offset=j1,
+            )
+        )
+
+    return matches
+
+
+def Ranges(indices: list[int]) -> str:
+    if not indices:
+        return "<none>"
+
+    parts: list[str] = []
+    start = previous = indices[0]
+    for index in [*indices[1:], None]:
+        if index is not None and index == previous + 1:
+            previous = index
+            continue
+        parts.append(str(start) if start == previous else f"{start}-{previous}")
+        if index is not None:
+            start = previous = index
+
+    return ", ".join(parts)
+
+
+def _PairRanges(pairs: list[tuple[int, int]]) -> str:
+    """
+    Formats (student, reference) pairs as runs: `0-3 = 0-3, 6 = 5`.
+    """
+    if not pairs:
+        return "<none>"
+
+    runs: list[list[tuple[int, int]]] = [[pairs[0]]]
+    for student, reference in pairs[1:]:
+        last_student, last_reference = runs[-1][-1]
+        if (student, reference) == (last_student + 1, last_reference + 1):
+            runs[-1].append((student, reference))
+        else:
+            runs.append([(student, reference)])
+
+    return ", ".join(
+        f"{Ranges([s for s, _ in run])} = {Ranges([r for _, r in run])}" for run in runs
+    )
+
+
+def RenderAlignedText(
+    student: ParsedNotebook,
+    matches: list[CellMatch],
+    selected: set[int] | None = None,
+) -> str:
+    """
+    The student notebook without the cells that are identical to the reference
+    (template cells), preceded by a compact alignment map. With `selected`,
+    only those of the remaining cells are shown (see `SelectRelevantCells`).
+    """
+    student_cells = student.cells
+
+    identical = [
+        (m.student, m.reference)
+        for m in matches
+        if m.identical and m.student is not None and m.reference is not None
+    ]
+    modified = [
+        (m.student, m.reference)
+        for m in matches
+        if not m.identical and m.student is not None and m.reference is not None
+    ]
+    added = [
+        m.student for m in matches if m.reference is None and m.student is not None
+    ]
+    missing = [
+        m.reference for m in matches if m.student is None and m.reference is not None
+    ]
+
+    lines: list[str] = []
+    lines.append(f"Total cells: {len(student_cells)}")
+    lines.append("")
+    lines.append("Alignment with the reference notebook:")
+    lines.append(
+        "- identical to the reference, omitted below (student cells = reference cells): "
+        + _PairRanges(identical)
+    )
+    lines.append(
+        "- modified (student cell -> reference cell): "
+        + (
+            ", ".join(f"{student}->{reference}" for student, reference in modified)
+            or "<none>"
+        )
+    )
+    lines.append(f"- added, no reference counterpart (student cells): {Ranges(added)}")
+    lines.append(f"- missing from the submission (reference cells): {Ranges(missing)}")
+    lines.append(
+        "Omitted cells are present in the submission exactly as in the reference."
+    )
+
+    notes = {
+        student: f"Alignment: modified reference cell {reference}"
+        for student, reference in modified
+    }
+    notes.update(dict.fromkeys(added, "Alignment: added, no reference counterpart"))
+
+    if selected is not None:
+        hidden = sorted(notes.keys() - selected)
+        lines.append(
+            "Cells not relevant to the graded tasks are present in the submission "
+            f"but not shown (student cells): {Ranges(hidden)}"
+        )
+
+    for cell_index, cell in enumerate(student_cells):
+        if cell_index not in notes or (
+            selected is not None and cell_index not in selected
+        ):
+            continue
+        cell_lines = RenderCellText(cell)
+        lines.append("")
+        lines.append(cell_lines[0])
+        lines.append(notes[cell_index])
+        lines.extend(cell_lines[1:])
+
+    return "\n".join(lines).rstrip() + "\n"
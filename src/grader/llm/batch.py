@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import re
+import shutil
+import zipfile
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+
+from grader.llm.accounting import SetSubmission
+from grader.llm.execute import ExecuteSubmission
+from grader.llm.executor import grading_executor
+from grader.llm.filenames import Filenames
+from grader.llm.gradebook import (
+    CollectGradebook,
+    GradebookStatistics,
+    WriteGradebookCSV,
+    WriteGradebookXLSX,
+    WriteStatisticsCSV,
+)
+from grader.llm.grader import GradeNotebook, PrepareSubmission, RenderReport
+from grader.llm.usage import LLMUsage
+
+ARCHIVE_NAME = "archive.zip"
+RESULTS_NAME = "results.zip"
+SUMMARY_NAME = "summary.csv"
+STATISTICS_NAME = "statistics.csv"
+GRADEBOOK_NAME = "gradebook.xlsx"
+_SUBMISSIONS_DIR = "submissions"
+_MAX_FAILED_SHOWN = 20  # Telegram captions are limited to 1024 characters
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass
+class BatchSubmission:
+    name: str
+    path: Path
+    error: str | None = None
+    usage: LLMUsage | None = None  # None if graded from the result cache
+    execution_seconds: float | None = None  # None if not executed
+
+
+def _SafeName(member: str) -> str:
+    stem = PurePosixPath(member).stem
+    return re.sub(r"[^\w.-]+", "_", stem).strip("._") or "notebook"
+
+
+def ExtractSubmissions(
+    batch_path: Path, max_files: int, max_file_bytes: int, max_total_bytes: int
+) -> list[BatchSubmission]:
+    """
+    Unpacks every `.ipynb` from the uploaded archive into its own directory
+    (`submissions/<name>/hw.ipynb`), so each one can go through the usual pipeline.
+    Member paths are never used as filesystem paths, only their sanitized stems.
+    Uncompressed sizes are checked before a member is written: an archive with
+    a notebook over `max_file_bytes`, or over `max_total_bytes` in all, is rejected.
+    """
+    submissions_path = batch_path / _SUBMISSIONS_DIR
+    shutil.rmtree(submissions_path, ignore_errors=True)
+    submissions_path.mkdir(parents=True)
+
+    submissions: list[BatchSubmission] = []
+    used_names: set[str] = set()
+    total_bytes = 0
+
+    with zipfile.ZipFile(batch_path / ARCHIVE_NAME) as archive:
+        for info in archive.infolist():
+            member = PurePosixPath(info.filename)
+            if info.is_dir() or "__MACOSX" in member.parts:
+                continue
+            if member.suffix.lower() != ".ipynb" or member.name.startswith("."):
+                continue
+
+            if len(submissions) >= max_files:
+                raise ValueError(f"Archive contains more than {max_files} notebooks.")
+            if info.file_size > max_file_bytes:
+                raise ValueError(
+                    f"Notebook {info.filename} is larger than {max_file_bytes} bytes."
+                )
+            total_bytes += info.file_size
+            if total_bytes > max_total_bytes:
+                raise ValueError(
+                    f"Notebooks in the archive are larger than {max_total_bytes} bytes."
+                )
+
+            name = _SafeName(info.filename)
+            unique_name, suffix = name, 2
+            while unique_name in used_names:
+                unique_name, suffix = f"{name}_{suffix}", suffix + 1
+            used_names.add(unique_name)
+
+            path = submissions_path / unique_name
+            path.mkdir()
+            with (
+                archive.open(info) as src,
+                open(path / Filenames.ipynb.value, "wb") as dst,
+            ):
+                shutil.copyfileobj(src, dst)
+
+            submissions.append(BatchSubmission(name=unique_name, path=path))
+
+    return submissions
+
+
+async def GradeBatch(
+    reference_path: Path,
+    submissions: list[BatchSubmission],
+    concurrency: int,
+    on_progress: ProgressCallback,
+) -> None:
+    """
+    Grades submissions concurrently: at most `concurrency` are in flight,
+    and LLM requests additionally pass through the shared OpenRouter rate limiter.
+    PDF reports queue in the report renderer outside that limit, so grading
+    the next submissions does not wait for rendering.
+    A failing submission is recorded in its `error` and does not stop the batch.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    finished = 0
+
+    async def _GradeOne(submission: BatchSubmission) -> None:
+        nonlocal finished
+        SetSubmission(submission.name)  # this task's own copy of the context
+
+        try:
+            async with semaphore:
+                submission.execution_seconds = await ExecuteSubmission(submission.path)
+                prepared = await grading_executor.Run(
+                    PrepareSubmission, reference_path, submission.path
+                )
+                submission.usage = await GradeNotebook(
+                    reference_path, submission.path, prepared
+                )
+
+            await RenderReport(reference_path, submission.path)
+
+        except Exception as e:
+            logging.exception(f"Batch submission '{submission.name}' failed.")
+            submission.error = repr(e)
+
+        finished += 1
+        await on_progress(finished, len(submissions))
+
+    await asyncio.gather(*(_GradeOne(submission) for submission in submissions))
+
+
+def WriteBatchResults(
+    reference_path: Path,
+    batch_path: Path,
+    submissions: list[BatchSubmission],
+) -> tuple[Path, str]:
+    """
+    Writes the cohort gradebook: `summary.csv` (one row per submission, one
+    column per task), `statistics.csv` (score distribution per task) and both
+    as `gradebook.xlsx`. Packs them together with all PDF reports into
+    `results.zip`.
+    Returns the archive path and a short summary for the chat.
+    """
+    gradebook = CollectGradebook(
+        reference_path,
+        [(s.name, s.path, s.error) for s in submissions],
+    )
+    statistics = GradebookStatistics(gradebook)
+
+    results_path = batch_path / RESULTS_NAME
+    WriteGradebookCSV(gradebook, batch_path / SUMMARY_NAME)
+    WriteStatisticsCSV(statistics, batch_path / STATISTICS_NAME)
+    WriteGradebookXLSX(gradebook, statistics, batch_path / GRADEBOOK_NAME)
+
+    graded = gradebook.graded.tolist()
+    failed = [s.name for s, ok in zip(submissions, graded, strict=True) if not ok]
+
+    with zipfile.ZipFile(results_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name in (SUMMARY_NAME, STATISTICS_NAME, GRADEBOOK_NAME):
+            archive.write(batch_path / name, name)
+        for submission, ok in zip(submissions, graded, strict=True):
+            pdf_path = submission.path / "result.pdf"
+            if ok and pdf_path.exists():
+                archive.write(pdf_path, f"{submission.name}.pdf")
+
+    lines = [f"Проверено: {sum(graded)} из {len(submissions)}"]
+    if statistics:
+        total = statistics[-1]
+        lines.append(f"Средний балл: {total.mean:.2f} / {total.maximum:g}")
+        lines.append(f"Медиана: {total.median:g}")
+        totals = gradebook.totals[gradebook.graded]
+        lines.append(f"Мин / макс: {totals.min():g} / {totals.max():g}")
+    usage = sum(
+        (submission.usage for submission in submissions if submission.usage),
+        LLMUsage(),
+    )
+    if usage.input_tokens:
+        lines.append(
+            f"Токены: {usage.input_tokens} входных "
+            f"({usage.cached_share:.0%} из кэша провайдера), "
+            f"{usage.output_tokens} выходных"
+        )
+    if failed:
+        shown = ", ".join(failed[:_MAX_FAILED_SHOWN])
+        if len(failed) > _MAX_FAILED_SHOWN:
+            shown += f" и еще {len(failed) - _MAX_FAILED_SHOWN}"
+        lines.append(f"Не удалось проверить: {shown}")
+
+    return results_path, "\n".join(lines)
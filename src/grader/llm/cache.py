@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from grader.core.configs.paths import DIR_CACHE
+from grader.core.configs.settings import settings
+
+# the directory is swept once per this many writes, not on every one
+_EVICT_EVERY_PUTS = 64
+
+
+def HashParts(*parts: str) -> str:
+    """
+    SHA-256 over length-prefixed parts, so ("ab", "c") and ("a", "bc") differ.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResultCache:
+    """
+    Persistent content-addressed cache of LLM results: one JSON file per key.
+    Entries expire after `ttl_seconds`; when there are more than `max_entries`,
+    the least recently used ones (by file mtime, refreshed on hit) are evicted.
+    Eviction sweeps the directory every `_EVICT_EVERY_PUTS` writes, so the cache
+    may briefly hold that many entries over the limit per process.
+    """
+
+    def __init__(self, directory: Path, ttl_seconds: int, max_entries: int):
+        self._directory = directory
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.stats = CacheStats()
+
+    def _Path(self, key: str) -> Path:
+        return self._directory / key[:2] / f"{key}.json"
+
+    def _Count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self.stats, attr, getattr(self.stats, attr) + 1)
+
+    def Get(self, key: str) -> Any | None:
+        path = self._Path(key)
+
+        try:
+            age = time.time() - path.stat().st_mtime
+            if age > self._ttl_seconds:
+                path.unlink(missing_ok=True)
+                self._Count("evictions")
+                raise FileNotFoundError(path)
+
+            value = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._Count("misses")
+            logging.info(f"Cache miss {key[:12]}: {self.stats}.")
+            return None
+
+        self._Count("hits")
+        logging.info(f"Cache hit {key[:12]}: {self.stats}.")
+        return value
+
+    def Put(self, key: str, value: Any) -> None:
+        path = self._Path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # write-then-rename, so concurrent readers never see a partial entry
+        temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_text(json.dumps(value), encoding="utf-8")
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._puts += 1
+            sweep = self._puts % _EVICT_EVERY_PUTS == 0
+        if sweep:
+            self._Evict()
+
+    def _Evict(self) -> None:
+        entries: list[tuple[float, Path]] = []
+        for path in self._directory.glob("*/*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:  # removed by another worker meanwhile
+                continue
+        entries.sort()
+
+        deadline = time.time() - self._ttl_seconds
+        overflow = len(entries) - self._max_entries
+
+        for index, (mtime, path) in enumerate(entries):
+            if index >= overflow and mtime >= deadline:
+                break
+            path.unlink(missing_ok=True)
+            self._Count("evictions")
+
+
+grading_cache = ResultCache(
+    directory=DIR_CACHE / "grading",
+    ttl_seconds=settings.GRADING_CACHE_TTL_SECONDS,
+    max_entries=settings.GRADING_CACHE_MAX_ENTRIES,
+)
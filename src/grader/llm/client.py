@@ -0,0 +1,57 @@
+import logging
+
+import httpx2
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from grader.core.configs.settings import settings
+
+
+class OpenRouterClient:
+    """
+    The process-wide `AsyncOpenAI` client: one connection pool with keep-alive,
+    shared by the reference and grading paths. Created in `Start` rather than
+    at import, so process pool workers that never call the LLM do not open one.
+    """
+
+    def __init__(self) -> None:
+        self._client: AsyncOpenAI | None = None
+
+    def Start(self) -> None:
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx2.Limits(
+                max_connections=settings.OPENROUTER_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENROUTER_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENROUTER_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx2.Timeout(
+                settings.OPENROUTER_TIMEOUT_SECONDS,
+                connect=settings.OPENROUTER_CONNECT_TIMEOUT_SECONDS,
+            ),
+        )
+        self._client = AsyncOpenAI(
+            base_url=settings.OPENROUTER_BASE_URL,
+            api_key=settings.OPENROUTER_API_KEY.get_secret_value(),
+            http_client=http_client,
+            max_retries=0,  # retries and fallbacks are done by `CallWithFallback`
+        )
+
+        logging.info(
+            f"# OpenRouter client started: {settings.OPENROUTER_BASE_URL}, "
+            f"max_connections={settings.OPENROUTER_MAX_CONNECTIONS}."
+        )
+
+    async def Close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+        logging.info("# OpenRouter client closed.")
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            raise RuntimeError("OpenRouter client is not started.")
+        return self._client
+
+
+openrouter = OpenRouterClient()
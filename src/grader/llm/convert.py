@@ -1,17 +1,19 @@
-import base64
 import json
+import logging
 from collections.abc import Iterable
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 
-import nbformat
-
+from grader.core.configs.settings import settings
 from grader.llm.filenames import Filenames
+from grader.llm.notebook import IterNotebookCells
+from grader.llm.truncate import OutputLimiter, TruncationReport
 
 # TODO: pip install
-# TODO: limit output
 
 
-def _IterOutputText(output: nbformat.NotebookNode) -> Iterable[str]:
+def _IterOutputText(output: dict[str, Any]) -> Iterable[str]:
     output_type = output.get("output_type")
     if output_type == "stream":
         text = output.get("text", "")
@@ -40,142 +42,227 @@ def _IterOutputText(output: nbformat.NotebookNode) -> Iterable[str]:
             yield "\n".join(str(line) for line in traceback)
 
 
-def _ExtractImages(
-    output: nbformat.NotebookNode,
-    output_directory: Path,
-    cell_index: int,
-    output_index: int,
-) -> list[str]:
-    saved_paths: list[str] = []
+def _OutputImages(output: dict[str, Any]) -> list[str]:
+    # `IterNotebookCells` has already replaced them with their filenames
     data = output.get("data", {})
     if not isinstance(data, dict):
-        return saved_paths
+        return []
+
+    return [
+        data[mime_type]
+        for mime_type in ("image/png", "image/jpeg")
+        if data.get(mime_type)
+    ]
+
+
+def _CreateOutputLimiter() -> OutputLimiter:
+    return OutputLimiter(
+        head_lines=settings.OUTPUT_LIMIT_HEAD_LINES,
+        tail_lines=settings.OUTPUT_LIMIT_TAIL_LINES,
+        max_line_chars=settings.OUTPUT_LIMIT_LINE_CHARS,
+        max_cell_chars=settings.OUTPUT_LIMIT_CELL_CHARS,
+        max_notebook_chars=settings.OUTPUT_LIMIT_NOTEBOOK_CHARS,
+    )
+
+
+@dataclass(slots=True)
+class NotebookCell:
+    index: int
+    cell_type: str
+    source: str
+    # code cells only
+    output_texts: list[str] = field(default_factory=list)
+    output_images: list[str] = field(default_factory=list)
+
+    def IntoDict(self) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "cell_index": self.index,
+            "cell_type": self.cell_type,
+        }
+        if self.cell_type == "code":
+            payload["source_code"] = self.source
+            payload["output_texts"] = self.output_texts
+            payload["output_images"] = self.output_images
+        else:
+            payload["source"] = self.source
+        return payload
+
+    @classmethod
+    def FromDict(cls, payload: dict[str, Any]) -> "NotebookCell":
+        return cls(
+            index=payload.get("cell_index", 0),
+            cell_type=payload.get("cell_type", "unknown"),
+            source=payload.get("source_code", payload.get("source", "")),
+            output_texts=payload.get("output_texts", []),
+            output_images=payload.get("output_images", []),
+        )
+
 
-    for mime_type, extension in (("image/png", "png"), ("image/jpeg", "jpg")):
-        payload = data.get(mime_type)
-        if not payload:
-            continue
-        image_bytes = base64.b64decode(payload)
-        filename = f"cell_{cell_index:03d}_output_{output_index:02d}.{extension}"
-        file_path = output_directory / filename
-        file_path.write_bytes(image_bytes)
-        saved_paths.append(str(file_path.relative_to(output_directory)))
+@dataclass(slots=True)
+class ParsedNotebook:
+    source_file: str
+    cells: list[NotebookCell]
+    truncation: TruncationReport
 
-    return saved_paths
+    def IntoDict(self) -> dict[str, Any]:
+        return {
+            "source_file": self.source_file,
+            "cells": [cell.IntoDict() for cell in self.cells],
+            "output_truncation": self.truncation.IntoDict(),
+        }
 
 
-def ProcessRawJupyterToJSON(directory_path: Path) -> None:
+def ParseNotebook(directory_path: Path) -> ParsedNotebook:
     """
     The function reads the notebook without executing it,
-    creates json consisting of cells' markdown, code, and existing output,
-    and writes any embedded images to the output directory.
+    collects cells' markdown, code, and existing output,
+    and writes any embedded images to the output directory
+    (unless `GRADING_EXTRACT_IMAGES` is off; they are still listed by name).
+    The notebook is streamed cell by cell (see `IterNotebookCells`), so memory
+    does not grow with its size or the number of plots.
+    Output texts are bounded by `OutputLimiter`; what was dropped is reported
+    in `truncation`.
     """
     ipynb_file_path = directory_path / Filenames.ipynb.value
 
-    notebook = nbformat.read(ipynb_file_path, as_version=4)
-    cells_payload: list[dict[str, object]] = []
+    cells: list[NotebookCell] = []
+    limiter = _CreateOutputLimiter()
 
-    for cell_index, cell in enumerate(notebook.cells):
-        cell_payload: dict[str, object] = {
-            "cell_index": cell_index,
-            "cell_type": cell.get("cell_type", "unknown"),
-        }
-        source = cell.get("source", "")
-        if cell.get("cell_type") == "code":
-            cell_payload["source_code"] = source
-        else:
-            cell_payload["source"] = source
+    image_directory = directory_path if settings.GRADING_EXTRACT_IMAGES else None
+    raw_cells = IterNotebookCells(ipynb_file_path, image_directory)
+    for cell_index, raw_cell in enumerate(raw_cells):
+        cell = NotebookCell(
+            index=cell_index,
+            cell_type=raw_cell.get("cell_type", "unknown"),
+            source=raw_cell.get("source", ""),
+        )
 
-        if cell.get("cell_type") == "code":
+        if cell.cell_type == "code":
             output_texts: list[str] = []
-            output_images: list[str] = []
-            outputs = cell.get("outputs", [])
-            for output_index, output in enumerate(outputs):
+            for output in raw_cell.get("outputs", []):
                 output_texts.extend(_IterOutputText(output))
-                output_images.extend(
-                    _ExtractImages(output, directory_path, cell_index, output_index)
-                )
-            cell_payload["output_texts"] = output_texts
-            cell_payload["output_images"] = output_images
+                cell.output_images.extend(_OutputImages(output))
+            cell.output_texts = limiter.LimitCell(output_texts)
 
-        cells_payload.append(cell_payload)
+        cells.append(cell)
 
-    json_payload = {
-        "source_file": str(ipynb_file_path),
-        "cells": cells_payload,
-    }
+    if limiter.report.chars_dropped:
+        logging.info(f"Outputs of {ipynb_file_path} truncated: {limiter.report}.")
 
+    return ParsedNotebook(str(ipynb_file_path), cells, limiter.report)
+
+
+def WriteParsedJSON(notebook: ParsedNotebook, directory_path: Path) -> None:
     parsed_path = directory_path / Filenames.parsed_json.value
-    parsed_path.write_text(json.dumps(json_payload, indent=2, sort_keys=True))
+    parsed_path.write_text(json.dumps(notebook.IntoDict(), indent=2, sort_keys=True))
+
 
+def ReadParsedJSON(directory_path: Path) -> ParsedNotebook:
+    payload = json.loads((directory_path / Filenames.parsed_json.value).read_text())
 
-def ProcessJSONToLLMFriendlyText(directory_path: Path) -> None:
+    return ParsedNotebook(
+        source_file=payload.get("source_file", ""),
+        cells=[NotebookCell.FromDict(cell) for cell in payload.get("cells", [])],
+        truncation=TruncationReport(**payload.get("output_truncation", {})),
+    )
+
+
+def RenderCellText(cell: NotebookCell) -> list[str]:
     """
-    The function converts ProcessRawJupyter JSON into a text format that is easy for LLMs
-    to read and analyze. It returns the formatted text and optionally writes it to disk.
+    Renders one notebook cell as LLM-friendly lines,
+    starting with the `<----- Cell N (type) ----->` header.
     """
-    json_file_path = directory_path / Filenames.parsed_json.value
-    payload = json.loads(json_file_path.read_text())
+    lines: list[str] = []
+    lines.append(f"<----- Cell {cell.index} ({cell.cell_type}) ----->")
 
-    cells = payload.get("cells", [])
+    if cell.cell_type == "markdown":
+        if cell.source:
+            lines.append("```md")
+            lines.append(cell.source.rstrip())
+            lines.append("```")
+        else:
+            lines.append("Markdown: <empty>")
+        return lines
 
+    if cell.cell_type == "code":
+        lines.append("```py")
+        lines.append(cell.source.rstrip())
+        lines.append("```")
+
+        lines.append("")
+        if cell.output_texts:
+            lines.append("Outputs:")
+            for output_index, output_text in enumerate(cell.output_texts, start=1):
+                lines.append(f"- Output {output_index}:")
+                lines.append("```text")
+                lines.append(str(output_text).rstrip())
+                lines.append("```")
+        else:
+            lines.append("Outputs: <none>")
+
+        lines.append("")
+        if cell.output_images:
+            lines.append("Output images:")
+            for image_path in cell.output_images:
+                lines.append(f"- {image_path}")
+        else:
+            lines.append("Output images: <none>")
+        return lines
+
+    if cell.source:
+        lines.append("Content:")
+        lines.append("```text")
+        lines.append(cell.source.rstrip())
+        lines.append("```")
+    else:
+        lines.append("Content: <empty>")
+    return lines
+
+
+def RenderNotebookText(
+    notebook: ParsedNotebook, selected: set[int] | None = None
+) -> str:
+    """
+    Renders the parsed notebook in a text format that is easy for LLMs
+    to read and analyze. With `selected`, only those cells are shown.
+    """
     lines: list[str] = []
-    lines.append(f"Total cells: {len(cells)}")
+    lines.append(f"Total cells: {len(notebook.cells)}")
+
+    truncation = notebook.truncation
+    if truncation.chars_dropped:
+        lines.append(
+            f"Outputs truncated: {truncation.chars_dropped} of "
+            f"{truncation.chars_total} characters dropped "
+            f"({truncation.outputs_truncated} outputs affected)."
+        )
+
+    cells = notebook.cells
+    if selected is not None:
+        cells = [cell for position, cell in enumerate(cells) if position in selected]
+        lines.append(
+            f"Only the {len(cells)} cells relevant to the graded tasks are shown; "
+            "the others are present in the submission."
+        )
 
     for cell in cells:
-        cell_index = cell.get("cell_index", "unknown")
-        cell_type = cell.get("cell_type", "unknown")
         lines.append("")
-        lines.append(f"<----- Cell {cell_index} ({cell_type}) ----->")
+        lines.extend(RenderCellText(cell))
 
-        if cell_type == "markdown":
-            source = cell.get("source", "")
-            if source:
-                lines.append("```md")
-                lines.append(str(source).rstrip())
-                lines.append("```")
-            else:
-                lines.append("Markdown: <empty>")
-            continue
-
-        if cell_type == "code":
-            source_code = cell.get("source_code", "")
-            lines.append("```py")
-            lines.append(str(source_code).rstrip())
-            lines.append("```")
+    return "\n".join(lines).rstrip() + "\n"
 
-            lines.append("")
-            output_texts = cell.get("output_texts", [])
-            if output_texts:
-                lines.append("Outputs:")
-                for output_index, output_text in enumerate(output_texts, start=1):
-                    lines.append(f"- Output {output_index}:")
-                    lines.append("```text")
-                    lines.append(str(output_text).rstrip())
-                    lines.append("```")
-            else:
-                lines.append("Outputs: <none>")
-
-            lines.append("")
-            output_images = cell.get("output_images", [])
-            if output_images:
-                lines.append("Output images:")
-                for image_path in output_images:
-                    lines.append(f"- {image_path}")
-            else:
-                lines.append("Output images: <none>")
-            continue
-
-        source = cell.get("source", "")
-        if source:
-            lines.append("Content:")
-            lines.append("```text")
-            lines.append(str(source).rstrip())
-            lines.append("```")
-        else:
-            lines.append("Content: <empty>")
 
-    rendered_text = "\n".join(lines).rstrip() + "\n"
+def ConvertNotebook(directory_path: Path, write_files: bool) -> ParsedNotebook:
+    """
+    Parses `hw.ipynb` in a single pass. With `write_files`, also writes `hw.json`
+    and `hw_llm.txt`: needed for references, which are stored and reused,
+    and kept for submissions only with `GRADING_KEEP_INTERMEDIATE_FILES`.
+    """
+    notebook = ParseNotebook(directory_path)
+
+    if write_files:
+        WriteParsedJSON(notebook, directory_path)
+        output_path = directory_path / Filenames.llm_friendly.value
+        output_path.write_text(RenderNotebookText(notebook))
 
-    output_path = Path(directory_path / Filenames.llm_friendly.value)
-    output_path.write_text(rendered_text)
+    return notebook
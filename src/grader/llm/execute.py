@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import os
+import pwd
+import shutil
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import nbformat
+from jupyter_client.asynchronous.client import AsyncKernelClient
+from jupyter_client.manager import AsyncKernelManager
+from nbclient import NotebookClient
+
+from grader.core.configs.settings import settings
+from grader.llm.executor import grading_executor
+from grader.llm.filenames import Filenames
+from grader.llm.notebook import IterNotebookCells
+
+_NOTEBOOK_FORMAT = 4
+_KERNEL_STARTUP_SECONDS = 60
+_RETRY_SECONDS = 10
+# the kernel gets none of the bot's secrets (tokens, DSN, API keys)
+_KERNEL_ENV_KEYS = ("PATH", "LANG", "LC_ALL", "PYTHONPATH", "VIRTUAL_ENV")
+_CONNECTION_FILE = "kernel.json"
+_PRLIMIT = "prlimit"  # util-linux, in every Debian image
+
+
+@dataclass(slots=True)
+class _Kernel:
+    manager: AsyncKernelManager
+    client: AsyncKernelClient
+    directory: Path  # its own scratch working directory
+
+
+def _SandboxUser() -> pwd.struct_passwd:
+    """
+    The unprivileged `GRADING_EXECUTE_USER` kernels run as. Raises if there
+    is none, or if this process cannot switch to it: submissions are never
+    executed with the bot's own privileges.
+    """
+    name = settings.GRADING_EXECUTE_USER
+    try:
+        user = pwd.getpwnam(name)
+    except KeyError:
+        raise RuntimeError(
+            f"GRADING_EXECUTE_USER '{name}' does not exist; create it or "
+            "disable GRADING_EXECUTE_NOTEBOOKS."
+        ) from None
+
+    if user.pw_uid in (0, os.geteuid()):
+        raise RuntimeError(
+            f"GRADING_EXECUTE_USER '{name}' must be unprivileged and not the "
+            "user the worker runs as."
+        )
+    if os.geteuid() != 0:
+        raise RuntimeError(
+            "Executing notebooks needs a worker running as root in its own "
+            "container, to start kernels as GRADING_EXECUTE_USER."
+        )
+    if shutil.which(_PRLIMIT) is None:
+        raise RuntimeError(f"Executing notebooks needs `{_PRLIMIT}` (util-linux).")
+
+    return user
+
+
+def _KernelEnv(directory: Path) -> dict[str, str]:
+    env = {key: os.environ[key] for key in _KERNEL_ENV_KEYS if key in os.environ}
+    env["HOME"] = str(directory)
+    return env
+
+
+async def _StartKernel(user: pwd.struct_passwd) -> _Kernel:
+    directory = Path(tempfile.mkdtemp(prefix="grader-kernel-"))
+    os.chown(directory, user.pw_uid, user.pw_gid)
+    memory = settings.GRADING_EXECUTE_MEMORY_MB * 1024 * 1024
+
+    manager = AsyncKernelManager(
+        kernel_name=settings.GRADING_EXECUTE_KERNEL_NAME,
+        # not the bot's runtime directory, which the kernel's user cannot read
+        connection_file=str(directory / _CONNECTION_FILE),
+        # ports stay as written below instead of being picked again at start
+        cache_ports=False,
+    )
+    try:
+        # written here for the kernel's user (the start reuses it): no Python
+        # may run between fork and exec, as the worker has other threads
+        manager.write_connection_file()
+        os.chown(manager.connection_file, user.pw_uid, user.pw_gid)
+
+        # the kernel lowers its own limit, already as its user, then starts;
+        # setting it from here would need CAP_SYS_RESOURCE, not in containers
+        assert manager.kernel_spec is not None
+        manager.kernel_spec.argv = [
+            _PRLIMIT,
+            f"--as={memory}",
+            "--",
+            *manager.format_kernel_cmd(),
+        ]
+
+        await manager.start_kernel(
+            cwd=str(directory),
+            env=_KernelEnv(directory),
+            user=user.pw_uid,
+            group=user.pw_gid,
+            extra_groups=[],
+        )
+        client = manager.client()
+        client.start_channels()
+        await client.wait_for_ready(timeout=_KERNEL_STARTUP_SECONDS)
+
+    except BaseException:  # also cancelled by `KernelPool.Shutdown`
+        await manager.shutdown_kernel(now=True)
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    return _Kernel(manager, client, directory)
+
+
+async def _StopKernel(kernel: _Kernel) -> None:
+    kernel.client.stop_channels()
+    try:
+        await kernel.manager.shutdown_kernel(now=True)
+    except Exception:
+        logging.exception("Failed to shut down a kernel.")
+    shutil.rmtree(kernel.directory, ignore_errors=True)
+
+
+class KernelPool:
+    """
+    Pre-started Jupyter kernels for executing submissions. A notebook gets a
+    fresh kernel, which is shut down after it (students never share state),
+    and a replacement starts right away in the background: the startup cost
+    is paid between submissions, not during one. At most `size` notebooks
+    execute at once.
+
+    Kernels run as the unprivileged `GRADING_EXECUTE_USER`, with a memory
+    limit, in a scratch directory and without the bot's environment. That
+    user must not be able to read the bot's files (the Docker image keeps
+    `.env` and `data` root-only); the network is not isolated.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._user: pwd.struct_passwd | None = None
+
+        self._ready: asyncio.Queue[_Kernel] | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def Start(self) -> None:
+        """
+        Raises if kernels cannot be sandboxed (see `_SandboxUser`).
+        """
+        if not settings.GRADING_EXECUTE_NOTEBOOKS:
+            return
+
+        self._user = _SandboxUser()
+        self._ready = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self._size)
+        for _ in range(self._size):
+            self._Replenish()
+
+        logging.info(
+            f"# Kernel pool started: {self._size} kernels "
+            f"as '{self._user.pw_name}'."
+        )
+
+    async def Shutdown(self) -> None:
+        if self._ready is None:
+            return
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        while not self._ready.empty():
+            await _StopKernel(self._ready.get_nowait())
+        self._ready = None
+
+        logging.info("# Kernel pool stopped.")
+
+    def _Replenish(self) -> None:
+        task = asyncio.create_task(self._AddKernel())
+
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _AddKernel(self) -> None:
+        assert self._ready is not None and self._user is not None
+
+        while True:
+            try:
+                kernel = await _StartKernel(self._user)
+                break
+            except Exception:
+                logging.exception("Failed to start a kernel, retrying.")
+                await asyncio.sleep(_RETRY_SECONDS)
+
+        self._ready.put_nowait(kernel)
+
+    @asynccontextmanager
+    async def Kernel(self) -> AsyncIterator[_Kernel]:
+        assert self._ready is not None and self._semaphore is not None
+
+        async with self._semaphore:
+            kernel = await asyncio.wait_for(
+                self._ready.get(), timeout=_KERNEL_STARTUP_SECONDS
+            )
+            self._Replenish()
+
+            try:
+                yield kernel
+            finally:
+                await _StopKernel(kernel)
+
+
+kernel_pool = KernelPool(size=settings.GRADING_EXECUTE_KERNELS)
+
+
+def HasMissingOutputs(ipynb_path: Path) -> bool:
+    """
+    True if the notebook has code but no code cell was ever executed:
+    no outputs and no execution counts.
+    """
+    has_code = False
+    for cell in IterNotebookCells(ipynb_path, image_directory=None):
+        if cell.get("cell_type") != "code":
+            continue
+        if cell.get("outputs") or cell.get("execution_count") is not None:
+            return False
+        has_code = has_code or bool(cell.get("source", "").strip())
+
+    return has_code
+
+
+async def _ExecuteCells(client: NotebookClient) -> None:
+    # cell by cell instead of `async_execute`, which takes over the event loop's
+    # SIGINT/SIGTERM handlers (and removes them afterwards) and owns the kernel
+    client.reset_execution_trackers()
+    for index, cell in enumerate(client.nb.cells):
+        await client.async_execute_cell(
+            cell, index, execution_count=client.code_cells_executed + 1
+        )
+
+
+async def ExecuteNotebook(ipynb_path: Path) -> float:
+    """
+    Executes the notebook on a kernel from `kernel_pool` and writes it back
+    with its outputs. A cell running over `GRADING_EXECUTE_CELL_SECONDS` is
+    interrupted and execution goes on; at `GRADING_EXECUTE_TOTAL_SECONDS`, or
+    if the kernel dies (e.g. at the memory limit), it stops, and the outputs
+    produced so far are kept: errors are part of what is graded.
+    Returns the execution wall time in seconds.
+    """
+    notebook = await asyncio.to_thread(
+        nbformat.read, ipynb_path, as_version=_NOTEBOOK_FORMAT
+    )
+
+    async with kernel_pool.Kernel() as kernel:
+        client = NotebookClient(
+            notebook,
+            km=kernel.manager,
+            timeout=settings.GRADING_EXECUTE_CELL_SECONDS,
+            interrupt_on_timeout=True,
+            allow_errors=True,
+            record_timing=False,
+        )
+        client.kc = kernel.client
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(
+                _ExecuteCells(client), timeout=settings.GRADING_EXECUTE_TOTAL_SECONDS
+            )
+        except TimeoutError:
+            logging.warning(f"Execution of {ipynb_path} stopped at the time limit.")
+        except Exception:
+            logging.exception(f"Execution of {ipynb_path} failed.")
+        elapsed = time.monotonic() - started
+
+    await asyncio.to_thread(nbformat.write, notebook, ipynb_path)
+    logging.info(f"Executed {ipynb_path} in {elapsed:.1f}s.")
+
+    return elapsed
+
+
+async def ExecuteSubmission(student_path: Path) -> float | None:
+    """
+    With `GRADING_EXECUTE_NOTEBOOKS`, executes a submission that has no outputs
+    (see `ExecuteNotebook`). Returns the execution wall time, or None if the
+    notebook was graded as uploaded.
+    """
+    if not settings.GRADING_EXECUTE_NOTEBOOKS:
+        return None
+
+    ipynb_path = student_path / Filenames.ipynb.value
+    if not await grading_executor.Run(HasMissingOutputs, ipynb_path):
+        return None
+
+    return await ExecuteNotebook(ipynb_path)
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import ParamSpec, TypeVar
+
+from grader.core.configs.settings import settings
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class GradingExecutor:
+    """
+    Runs blocking grading work (notebook conversion, reference storage, batch
+    archives) in a thread or process pool, so the event loop stays responsive.
+    At most `max_concurrency` calls are executed at the same time.
+    """
+
+    def __init__(self, kind: str, max_concurrency: int):
+        self._kind = kind
+        self._max_concurrency = max_concurrency
+
+        self._pool: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def Start(self) -> None:
+        if self._kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self._max_concurrency)
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self._max_concurrency,
+                thread_name_prefix="grading",
+            )
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        logging.info(
+            f"# Grading executor started: {self._kind} pool, "
+            f"max_concurrency={self._max_concurrency}."
+        )
+
+    async def Shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+        logging.info("# Grading executor stopped.")
+
+    async def Run(self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        """
+        Executes `fn` in the pool and awaits its result.
+        """
+        assert self._pool is not None and self._semaphore is not None
+
+        loop = asyncio.get_running_loop()
+
+        async with self._semaphore:
+            # `partial` (unlike a lambda) is picklable for the process pool
+            return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+
+
+grading_executor = GradingExecutor(
+    kind=settings.GRADING_EXECUTOR,
+    max_concurrency=settings.GRADING_MAX_CONCURRENCY,
+)
@@ -5,4 +5,5 @@ class Filenames(Enum):
     ipynb = "hw.ipynb"
     parsed_json = "hw.json"
     llm_friendly = "hw_llm.txt"
+    llm_aligned = "hw_llm_aligned.txt"
     task_structure = "hw_structure.txt"
@@ -0,0 +1,209 @@
+import csv
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import openpyxl
+
+from grader.llm.filenames import Filenames
+
+PERCENTILES = (10, 25, 75, 90)
+TOTAL_TITLE = "total"
+
+
+@dataclass(slots=True)
+class Gradebook:
+    """
+    Scores of a cohort as one matrix: a row per submission, a column per task
+    of `hw_structure.txt`. Rows of failed submissions are NaN; a task missing
+    from a graded `result.txt`, or scored null, scores 0, as in the PDF report.
+    """
+
+    names: list[str]
+    titles: list[str]
+    maxima: npt.NDArray[np.float64]  # (tasks,)
+    scores: npt.NDArray[np.float64]  # (submissions, tasks)
+    errors: list[str | None]
+
+    @property
+    def graded(self) -> npt.NDArray[np.bool_]:
+        return np.asarray(~np.isnan(self.scores).any(axis=1), dtype=np.bool_)
+
+    @property
+    def totals(self) -> npt.NDArray[np.float64]:
+        totals: npt.NDArray[np.float64] = self.scores.sum(axis=1)
+        return totals
+
+
+@dataclass(slots=True)
+class TaskStatistics:
+    title: str
+    maximum: float
+    graded: int
+    mean: float
+    median: float
+    percentiles: list[float]  # at `PERCENTILES`
+    share_of_max: float  # mean score over the maximum
+    full_score: float  # share of submissions with the maximum score
+
+
+def CollectGradebook(
+    reference_path: Path,
+    submissions: list[tuple[str, Path, str | None]],
+) -> Gradebook:
+    """
+    Reads `result.txt` of every (name, directory, error) submission; those with
+    an error or without results count as failed.
+    """
+    tasks: list[dict[str, Any]] = json.loads(
+        (reference_path / Filenames.task_structure.value).read_text(encoding="utf-8")
+    )["tasks"]
+    titles = [task["title"] for task in tasks]
+
+    scores = np.full((len(submissions), len(titles)), np.nan)
+    errors: list[str | None] = []
+
+    for row, (_, path, error) in enumerate(submissions):
+        result_path = path / "result.txt"
+        if error is None and not result_path.exists():
+            errors.append("no result.txt")
+            continue
+        errors.append(error)
+        if error is not None:
+            continue
+
+        results = json.loads(result_path.read_text(encoding="utf-8"))
+        scores[row] = [results.get(title, {}).get("score") or 0 for title in titles]
+
+    return Gradebook(
+        names=[name for name, _, _ in submissions],
+        titles=titles,
+        maxima=np.array([task["maximumScore"] for task in tasks], dtype=float),
+        scores=scores,
+        errors=errors,
+    )
+
+
+def GradebookStatistics(gradebook: Gradebook) -> list[TaskStatistics]:
+    """
+    Score distribution of every task and of the total over graded submissions,
+    computed column-wise on the whole matrix at once.
+    """
+    graded = gradebook.scores[gradebook.graded]
+    if not len(graded):
+        return []
+
+    columns = np.column_stack([graded, graded.sum(axis=1)])
+    maxima = np.append(gradebook.maxima, gradebook.maxima.sum())
+
+    means = columns.mean(axis=0)
+    medians = np.median(columns, axis=0)
+    percentiles = np.percentile(columns, PERCENTILES, axis=0)
+    share_of_max = np.divide(
+        means, maxima, out=np.full_like(means, np.nan), where=maxima > 0
+    )
+    full_score = (columns >= maxima).mean(axis=0)
+
+    return [
+        TaskStatistics(
+            title=title,
+            maximum=float(maxima[column]),
+            graded=len(graded),
+            mean=float(means[column]),
+            median=float(medians[column]),
+            percentiles=percentiles[:, column].tolist(),
+            share_of_max=float(share_of_max[column]),
+            full_score=float(full_score[column]),
+        )
+        for column, title in enumerate([*gradebook.titles, TOTAL_TITLE])
+    ]
+
+
+def _Cell(value: float) -> float | int | None:
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def _GradebookRows(gradebook: Gradebook) -> list[list[Any]]:
+    maximum = _Cell(float(gradebook.maxima.sum()))
+    rows: list[list[Any]] = [
+        ["submission", *gradebook.titles, TOTAL_TITLE, "maximum", "error"]
+    ]
+
+    for name, scores, total, error in zip(
+        gradebook.names,
+        gradebook.scores.tolist(),
+        gradebook.totals.tolist(),
+        gradebook.errors,
+        strict=True,
+    ):
+        rows.append([name, *map(_Cell, scores), _Cell(total), maximum, error])
+
+    return rows
+
+
+def _StatisticsRows(statistics: list[TaskStatistics]) -> list[list[Any]]:
+    rows: list[list[Any]] = [
+        [
+            "task",
+            "maximum",
+            "graded",
+            "mean",
+            "median",
+            *(f"p{percentile}" for percentile in PERCENTILES),
+            "share_of_max",
+            "full_score_share",
+        ]
+    ]
+
+    for task in statistics:
+        rows.append(
+            [
+                task.title,
+                _Cell(task.maximum),
+                task.graded,
+                _Cell(task.mean),
+                _Cell(task.median),
+                *map(_Cell, task.percentiles),
+                _Cell(task.share_of_max),
+                _Cell(task.full_score),
+            ]
+        )
+
+    return rows
+
+
+def _WriteCSV(rows: list[list[Any]], path: Path) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        csv.writer(file).writerows(rows)
+
+
+def WriteGradebookCSV(gradebook: Gradebook, path: Path) -> None:
+    _WriteCSV(_GradebookRows(gradebook), path)
+
+
+def WriteStatisticsCSV(statistics: list[TaskStatistics], path: Path) -> None:
+    _WriteCSV(_StatisticsRows(statistics), path)
+
+
+def WriteGradebookXLSX(
+    gradebook: Gradebook, statistics: list[TaskStatistics], path: Path
+) -> None:
+    """
+    Both tables as sheets of one workbook.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    for title, rows in (
+        ("gradebook", _GradebookRows(gradebook)),
+        ("statistics", _StatisticsRows(statistics)),
+    ):
+        sheet = workbook.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+
+    workbook.save(path)
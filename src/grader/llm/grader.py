@@ -1,26 +1,111 @@
+import asyncio
 import json
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, cast
 
-import markdown
 from jinja2 import Template
-from openai import OpenAI
-from weasyprint import HTML
+from openai import AsyncOpenAI
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseErrorEvent,
+    ResponseFailedEvent,
+    ResponseIncompleteEvent,
+    ResponseInputParam,
+    ResponseTextDeltaEvent,
+)
 
-from grader.core.configs.paths import PATH_GRADER_PROMPT
+from grader.core.configs.paths import (
+    PATH_GRADER_CONTEXT_PROMPT,
+    PATH_GRADER_INPUT_PROMPT,
+    PATH_GRADER_PROMPT,
+    PATH_GRADER_SHARD_PROMPT,
+)
 from grader.core.configs.settings import settings
-from grader.llm.convert import ProcessJSONToLLMFriendlyText, ProcessRawJupyterToJSON
+from grader.db.models.llm_call import LLMCallStage
+from grader.llm.align import AlignCells, CellMatch, RenderAlignedText
+from grader.llm.cache import HashParts, grading_cache
+from grader.llm.client import openrouter
+from grader.llm.convert import (
+    ConvertNotebook,
+    ParsedNotebook,
+    ReadParsedJSON,
+    RenderNotebookText,
+)
 from grader.llm.filenames import Filenames
+from grader.llm.hedge import CallHedged
+from grader.llm.incremental import CellFingerprints, ReferenceHash, SubmissionState
+from grader.llm.numeric import CheckNumericTasks
+from grader.llm.relevance import RenderTaskCells, SelectRelevantCells, TaskQueries
+from grader.llm.report import ScoreSummary, report_renderer
+from grader.llm.retry import LLMOutputError
+from grader.llm.usage import LLMUsage
+
+# called with (graded, total) tasks on the event loop; must not block
+GradingProgress = Callable[[int, int], None]
+
+
+class _StreamedObject:
+    """
+    Follows a JSON object as it is streamed and counts its top-level values
+    that are already complete, i.e. tasks whose result has fully arrived.
+    """
+
+    def __init__(self) -> None:
+        self.completed = 0
+
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def Feed(self, chunk: str) -> bool:
+        """
+        Returns True if `chunk` completed at least one more top-level value.
+        """
+        completed = self.completed
+
+        for char in chunk:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self.completed += 1
+
+        return self.completed != completed
+
+
+@dataclass(slots=True)
+class PreparedSubmission:
+    notebook_text: str  # what the LLM sees: aligned or full
+    verified: dict[str, Any]  # tasks graded without the LLM
+    state: SubmissionState | None = None  # with `GRADING_INCREMENTAL`
+    # per task, only its relevant cells (with `GRADING_RELEVANCE` and `GRADING_SHARDED`)
+    task_notebooks: dict[str, str] = field(default_factory=dict)
+
 
 class Grader:
     def __init__(self):
-        self._client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=settings.OPENROUTER_API_KEY.get_secret_value(),
-        )
-        self._model = "deepseek/deepseek-v3.2"
-
-        self._system_prompt = Template(PATH_GRADER_PROMPT.read_text())
+        # system prompt -> tasks + reference -> student notebook:
+        # everything before the student notebook is a byte-stable prefix
+        # shared by all submissions of an assignment (provider prompt caching)
+        self._system_prompt = PATH_GRADER_PROMPT.read_text()
+        self._context_prompt = Template(PATH_GRADER_CONTEXT_PROMPT.read_text())
+        self._input_prompt = Template(PATH_GRADER_INPUT_PROMPT.read_text())
+        self._shard_prompt = Template(PATH_GRADER_SHARD_PROMPT.read_text())
 
         self._result_schema = {
             "type": "object",
@@ -41,13 +126,20 @@ class Grader:
             "additionalProperties": False,
         }
 
+    @property
+    def _client(self) -> AsyncOpenAI:
+        return openrouter.client
+
     def _build_output_schema(self, task_list_path: Path) -> dict[str, Any]:
         task_payload = json.loads(task_list_path.read_text(encoding="utf-8"))
         tasks = task_payload.get("tasks", [])
 
-        properties = {
-            task["title"]: self._result_schema for task in tasks if "title" in task
-        }
+        return self._build_titles_schema(
+            [task["title"] for task in tasks if "title" in task]
+        )
+
+    def _build_titles_schema(self, titles: list[str]) -> dict[str, Any]:
+        properties = dict.fromkeys(titles, self._result_schema)
         required = list(properties.keys())
 
         return {
@@ -58,120 +150,408 @@ class Grader:
             "additionalProperties": False,
         }
 
-    def grade(
+    def _build_messages(
         self,
-        task_list_path: Path,
-        reference_notebook_path: Path,
-        input_notebook_path: Path,
-    ) -> None:
-        resp = self._client.responses.create(
-            model=self._model,
-            input=[
-                {
-                    "role": "system",
-                    "content": self._system_prompt.render(
-                        items_to_check=task_list_path.read_text(encoding="utf-8"),
-                        input_notebook=input_notebook_path.read_text(encoding="utf-8"),
-                        reference_notebook=reference_notebook_path.read_text(
-                            encoding="utf-8"
-                        ),
-                    ),
-                },
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "task_structure",
-                    "strict": True,
-                    "schema": self._build_output_schema(task_list_path),
-                }
+        items_to_check: str,
+        reference_notebook: str,
+        input_notebook: str,
+        verified_titles: list[str],
+    ) -> list[dict[str, str]]:
+        return [
+            {
+                "role": "system",
+                "content": self._system_prompt,
+            },
+            {
+                "role": "user",
+                "content": self._context_prompt.render(
+                    items_to_check=items_to_check,
+                    reference_notebook=reference_notebook,
+                ),
+            },
+            {
+                "role": "user",
+                "content": self._input_prompt.render(
+                    input_notebook=input_notebook,
+                    verified_tasks="\n".join(f"- {t}" for t in verified_titles),
+                ),
             },
+        ]
+
+    async def _request(
+        self,
+        messages: list[dict[str, str]],
+        output_schema: dict[str, Any],
+        label: str,
+        on_task: Callable[[int], None] | None = None,
+    ) -> tuple[dict[str, Any], LLMUsage | None]:
+        """
+        One structured-output call, served from the result cache when possible.
+        Failures are retried and fall back to other models (`CallWithFallback`);
+        slow requests may be duplicated (`CallHedged`).
+        With `GRADING_STREAM` the response is streamed and `on_task` is called
+        with the number of task results received so far.
+        Returns the parsed JSON and the usage (None on a cache hit).
+        """
+        cache_key = HashParts(
+            json.dumps(messages, ensure_ascii=False),
+            *settings.OPENROUTER_MODELS,
+            json.dumps(output_schema, sort_keys=True),
+        )
+
+        if settings.GRADING_CACHE_ENABLED:
+            cached = await asyncio.to_thread(grading_cache.Get, cache_key)
+            if cached is not None:
+                return cached, None
+
+        text_format: Any = {
+            "format": {
+                "type": "json_schema",
+                "name": "task_structure",
+                "strict": True,
+                "schema": output_schema,
+            }
+        }
+
+        async def _Attempt(model: str) -> tuple[dict[str, Any], LLMUsage]:
+            started = time.monotonic()
+            if settings.GRADING_STREAM:
+                resp = await self._stream(model, messages, text_format, on_task)
+            else:
+                resp = await self._client.responses.create(
+                    model=model,
+                    input=messages,  # type: ignore[arg-type]
+                    text=text_format,
+                )
+            usage = LLMUsage.FromResponse(resp, latency=time.monotonic() - started)
+            logging.info(
+                f"Graded {label} with '{model}': {usage.input_tokens} input "
+                f"({usage.cached_tokens} cached), {usage.output_tokens} output tokens, "
+                f"{usage.latency:.1f}s."
+            )
+
+            result: dict[str, Any] = json.loads(resp.output_text)
+
+            missing = set(output_schema["required"]) - result.keys()
+            if missing:
+                raise LLMOutputError(f"LLM result misses tasks: {sorted(missing)}")
+
+            return result, usage
+
+        result, usage = await CallHedged(_Attempt, label, LLMCallStage.grade)
+
+        if settings.GRADING_CACHE_ENABLED:
+            await asyncio.to_thread(grading_cache.Put, cache_key, result)
+
+        return result, usage
+
+    async def _stream(
+        self,
+        model: str,
+        messages: list[dict[str, str]],
+        text_format: Any,
+        on_task: Callable[[int], None] | None,
+    ) -> Response:
+        """
+        Streams the response, reporting every task result as soon as its JSON
+        object is closed. Returns the final response, as `responses.create` would.
+        """
+        streamed = _StreamedObject()
+        final: Response | None = None
+
+        stream = await self._client.responses.create(
+            model=model,
+            input=cast(ResponseInputParam, messages),
+            text=text_format,
+            stream=True,
         )
+        async for event in stream:
+            if isinstance(event, ResponseTextDeltaEvent):
+                if streamed.Feed(event.delta) and on_task is not None:
+                    on_task(streamed.completed)
+            elif isinstance(event, ResponseCompletedEvent):
+                final = event.response
+            elif isinstance(
+                event,
+                ResponseFailedEvent | ResponseIncompleteEvent | ResponseErrorEvent,
+            ):
+                raise LLMOutputError(f"LLM stream ended with '{event.type}': {event}")
+
+        if final is None:
+            raise LLMOutputError("LLM stream ended without a completed response.")
 
-        diff_json = json.loads(resp.output_text)
+        return final
 
-        save = input_notebook_path.parent / "result.txt"
-        save.write_text(json.dumps(diff_json, indent=2, sort_keys=True))
+    async def _grade_shard(
+        self,
+        messages: list[dict[str, str]],
+        title: str,
+        label: str,
+    ) -> tuple[dict[str, Any], LLMUsage | None]:
+        shard_messages = [
+            *messages,
+            {"role": "user", "content": self._shard_prompt.render(title=title)},
+        ]
+        shard_schema = self._build_titles_schema([title])
+
+        return await self._request(shard_messages, shard_schema, f"{label} [{title}]")
 
-    def generate_md_report(
+    async def _grade_sharded(
         self,
-        tasks_path: Path,
-        results_path: Path,
-        pdf_path: Path,
-    ) -> None:
+        task_messages: dict[str, list[dict[str, str]]],
+        label: str,
+        on_task: Callable[[int], None] | None = None,
+    ) -> tuple[dict[str, Any], LLMUsage | None]:
         """
-        Algorithmically generate markdown report and score table
-        from task descriptions and grading results.
+        Grades every task (keys of `task_messages`) in its own request, at most
+        `GRADING_SHARD_CONCURRENCY` at a time, and merges the per-task results.
         """
+        result: dict[str, Any] = {}
+        usage: LLMUsage | None = None
+
+        semaphore = asyncio.Semaphore(settings.GRADING_SHARD_CONCURRENCY)
+        finished = 0
+
+        async def _GradeShard(title: str) -> tuple[dict[str, Any], LLMUsage | None]:
+            nonlocal finished
+
+            async with semaphore:
+                shard = await self._grade_shard(task_messages[title], title, label)
+
+            finished += 1
+            if on_task is not None:
+                on_task(finished)
 
-        tasks_data: dict[str, Any] = json.loads(tasks_path.read_text(encoding="utf-8"))
-        results_data: dict[str, Any] = json.loads(
-            results_path.read_text(encoding="utf-8")
+            return shard
+
+        shards = await asyncio.gather(*(_GradeShard(title) for title in task_messages))
+
+        for shard_result, shard_usage in shards:
+            result.update(shard_result)
+            if shard_usage is not None:
+                usage = shard_usage if usage is None else usage + shard_usage
+
+        return result, usage
+
+    async def grade(
+        self,
+        reference_path: Path,
+        prepared: PreparedSubmission,
+        result_path: Path,
+        on_progress: GradingProgress | None = None,
+    ) -> LLMUsage | None:
+        """
+        Grades the rendered student notebook of `prepared` against the tasks and
+        the text of the processed reference in `reference_path`; writes the
+        results to `result_path`. Tasks in `prepared.verified` (already graded,
+        e.g. by the numeric checker) are not sent to the LLM; if that covers
+        every task, no request is made at all. Sharded requests get the task's
+        own text from `prepared.task_notebooks`, if there is one.
+        `on_progress` is called as task results arrive.
+        Returns the usage of the LLM calls, or None if nothing was requested.
+        """
+        verified = prepared.verified
+        task_list_path = reference_path / Filenames.task_structure.value
+        items_to_check = task_list_path.read_text(encoding="utf-8")
+        reference_notebook = (reference_path / Filenames.llm_friendly.value).read_text(
+            encoding="utf-8"
         )
 
-        md_lines = ["# Отчет по проверке\n"]
+        def _Messages(input_notebook: str) -> list[dict[str, str]]:
+            return self._build_messages(
+                items_to_check=items_to_check,
+                reference_notebook=reference_notebook,
+                input_notebook=input_notebook,
+                verified_titles=list(verified),
+            )
+
+        all_titles = self._build_output_schema(task_list_path)["required"]
+        titles = [title for title in all_titles if title not in verified]
+        label = str(result_path.parent)
 
-        for task in tasks_data["tasks"]:
-            title = task["title"]
-            description = task["description"]
-            max_score = task["maximumScore"]
+        def _OnTask(graded: int) -> None:
+            if on_progress is not None:
+                on_progress(len(verified) + graded, len(all_titles))
 
-            result = results_data.get(title, {})
-            comment = result.get("comment", "Комментарий отсутствует.")
-            score = result.get("score", 0)
+        _OnTask(0)
 
-            md_lines.extend(
-                [
-                    f"## {title}\n",
-                    f"**Условие:**  \n{description}\n",
-                    f"**Комментарий по проверке:**  \n{comment}\n",
-                    f"**Потенциальный балл:** {score} / {max_score}\n",
-                ]
+        diff_json: dict[str, Any]
+        usage: LLMUsage | None
+        if not titles:
+            logging.info(f"All tasks of {label} verified without the LLM.")
+            diff_json, usage = {}, None
+        elif settings.GRADING_SHARDED:
+            task_messages = {
+                title: _Messages(
+                    prepared.task_notebooks.get(title, prepared.notebook_text)
+                )
+                for title in titles
+            }
+            diff_json, usage = await self._grade_sharded(task_messages, label, _OnTask)
+        else:
+            diff_json, usage = await self._request(
+                _Messages(prepared.notebook_text),
+                self._build_titles_schema(titles),
+                label,
+                _OnTask,
             )
+        diff_json.update(verified)
+        _OnTask(len(titles))
+
+        result_path.write_text(json.dumps(diff_json, indent=2, sort_keys=True))
+
+        return usage
+
+
+# one instance per process: templates are compiled once, the client is shared
+notebook_grader = Grader()
+
+
+def PrepareSubmission(reference_path: Path, student_path: Path) -> PreparedSubmission:
+    """
+    Converts the student notebook and runs the checks that need its cells,
+    all in memory: the cells are parsed once, aligned with the reference once,
+    and shared by the aligned text, the numeric check and the fingerprints
+    for incremental re-grading. Intermediate files are written only with
+    `GRADING_KEEP_INTERMEDIATE_FILES`.
+    """
+    keep_files = settings.GRADING_KEEP_INTERMEDIATE_FILES
+    student = ConvertNotebook(student_path, write_files=keep_files)
+
+    if not (
+        settings.GRADING_ALIGN_CELLS
+        or settings.GRADING_NUMERIC_CHECK
+        or settings.GRADING_INCREMENTAL
+        or settings.GRADING_RELEVANCE
+    ):
+        return PreparedSubmission(RenderNotebookText(student), {})
 
-        md_lines.append("\n## Сводная таблица баллов\n")
-        md_lines.append("| Задача | Балл | Максимум |")
-        md_lines.append("|-------|------|----------|")
+    reference_cells = ReadParsedJSON(reference_path).cells
+    reference_hash = ReferenceHash(reference_path)
+    matches = AlignCells(reference_cells, student.cells)
 
-        for task in tasks_data["tasks"]:
-            title = task["title"]
-            max_score = task["maximumScore"]
-            score = results_data.get(title, {}).get("score", 0)
+    prepared = PreparedSubmission(
+        notebook_text="",
+        verified=(
+            CheckNumericTasks(reference_path, reference_cells, student, matches)
+            if settings.GRADING_NUMERIC_CHECK
+            else {}
+        ),
+    )
+
+    if settings.GRADING_INCREMENTAL:
+        prepared.state = SubmissionState(
+            reference_hash=reference_hash,
+            fingerprints=CellFingerprints(len(reference_cells), student.cells, matches),
+        )
 
-            md_lines.append(f"| {title} | {score} | {max_score} |")
+    def _Render(selected: set[int] | None = None) -> str:
+        if settings.GRADING_ALIGN_CELLS:
+            return RenderAlignedText(student, matches, selected)
+        return RenderNotebookText(student, selected)
 
-        # output_md_path.write_text("\n".join(md_lines), encoding="utf-8")
+    prepared.notebook_text = _Render()
+
+    selection = None
+    if settings.GRADING_RELEVANCE:
+        tasks = json.loads(
+            (reference_path / Filenames.task_structure.value).read_text(
+                encoding="utf-8"
+            )
+        )["tasks"]
+        selection = SelectRelevantCells(
+            [task for task in tasks if task["title"] not in prepared.verified],
+            TaskQueries(reference_hash, tasks, reference_cells),
+            student.cells,
+            matches,
+            candidates=_RenderedCells(student, matches),
+        )
 
-        # Преобразуем MD в HTML
-        html_text = markdown.markdown(
-            "\n".join(md_lines), extensions=["tables", "fenced_code"]
+    if selection is not None:
+        full_size = len(prepared.notebook_text.encode())
+        shown = {position for cells in selection.values() for position in cells}
+        prepared.notebook_text = RenderTaskCells(selection) + _Render(shown)
+        if settings.GRADING_SHARDED:
+            prepared.task_notebooks = {
+                title: _Render(set(cells)) for title, cells in selection.items()
+            }
+        logging.info(
+            f"Relevant cells of {student_path}: {len(shown)} of "
+            f"{len(student.cells)} shown, {len(prepared.notebook_text.encode())} "
+            f"instead of {full_size} bytes."
         )
 
-        # Генерируем PDF
-        HTML(string=html_text).write_pdf(str(pdf_path))
+    if not settings.GRADING_ALIGN_CELLS:
+        return prepared
+
+    if keep_files:
+        (student_path / Filenames.llm_aligned.value).write_text(prepared.notebook_text)
+
+    identical = sum(match.identical for match in matches)
+    logging.info(
+        f"Aligned {student_path}: {identical} of {len(student.cells)} cells "
+        f"identical to reference, {len(prepared.notebook_text.encode())} bytes sent."
+    )
+
+    return prepared
+
 
+def _RenderedCells(student: ParsedNotebook, matches: list[CellMatch]) -> list[int]:
+    """
+    Student cells the LLM text shows in full: all of them, or with alignment,
+    those not identical to the reference.
+    """
+    if not settings.GRADING_ALIGN_CELLS:
+        return list(range(len(student.cells)))
+    return sorted(
+        match.student
+        for match in matches
+        if match.student is not None and not match.identical
+    )
+
+
+def ConvertStudentNotebook(directory_path: Path) -> PreparedSubmission:
+    return PrepareSubmission(directory_path / "reference", directory_path / "student")
 
-def GradeInputNotebook(directory_path: Path) -> None:
-    reference_path = directory_path / "reference"
-    student_path = directory_path / "student"
 
-    ProcessRawJupyterToJSON(student_path)
-    ProcessJSONToLLMFriendlyText(student_path)
+async def GradeNotebook(
+    reference_path: Path,
+    student_path: Path,
+    prepared: PreparedSubmission,
+    on_progress: GradingProgress | None = None,
+) -> LLMUsage | None:
+    return await notebook_grader.grade(
+        reference_path=reference_path,
+        prepared=prepared,
+        result_path=student_path / "result.txt",
+        on_progress=on_progress,
+    )
 
-    reference_tasks_path = reference_path / Filenames.task_structure.value
-    reference_llm_path = reference_path / Filenames.llm_friendly.value
-    student_llm_path = student_path / Filenames.llm_friendly.value
-    result_path = student_path / "result.txt"
-    pdf_path = student_path / "result.pdf"
 
-    grader = Grader()
-    grader.grade(
-        task_list_path=reference_tasks_path,
-        reference_notebook_path=reference_llm_path,
-        input_notebook_path=student_llm_path,
+async def RenderReport(reference_path: Path, student_path: Path) -> None:
+    await report_renderer.Render(
+        tasks_path=reference_path / Filenames.task_structure.value,
+        results_path=student_path / "result.txt",
+        pdf_path=student_path / "result.pdf",
     )
-    grader.generate_md_report(
-        tasks_path=reference_tasks_path,
-        results_path=result_path,
-        pdf_path=pdf_path,
+
+
+async def GradeStudentNotebook(
+    directory_path: Path,
+    prepared: PreparedSubmission,
+    on_progress: GradingProgress | None = None,
+) -> None:
+    await GradeNotebook(
+        directory_path / "reference", directory_path / "student", prepared, on_progress
+    )
+
+
+async def RenderStudentReport(directory_path: Path) -> None:
+    await RenderReport(directory_path / "reference", directory_path / "student")
+
+
+def StudentScoreSummary(directory_path: Path) -> str:
+    return ScoreSummary(
+        tasks_path=directory_path / "reference" / Filenames.task_structure.value,
+        results_path=directory_path / "student" / "result.txt",
     )
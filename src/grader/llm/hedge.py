@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from grader.core.configs.settings import settings
+from grader.db.models.llm_call import LLMCallStage
+from grader.llm.retry import CallWithFallback
+from grader.llm.usage import LLMUsage
+
+
+class LatencyTracker:
+    """
+    Latencies of the most recent successful calls, for the hedging delay.
+    """
+
+    def __init__(self, window: int):
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def Record(self, latency: float) -> None:
+        self._latencies.append(latency)
+
+    def Percentile(self, percentile: float) -> float | None:
+        """
+        Nearest-rank percentile, or None until `OPENROUTER_HEDGE_MIN_SAMPLES` are seen.
+        """
+        if len(self._latencies) < settings.OPENROUTER_HEDGE_MIN_SAMPLES:
+            return None
+
+        ordered = sorted(self._latencies)
+        rank = max(0, round(percentile / 100 * len(ordered)) - 1)
+        return ordered[min(rank, len(ordered) - 1)]
+
+
+@dataclass
+class HedgeStats:
+    calls: int = 0
+    hedged: int = 0  # duplicates sent: the extra cost
+    hedge_wins: int = 0  # duplicates that answered first: the latency gained
+
+    def IntoDict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "p50": grading_latency.Percentile(50),
+            "p99": grading_latency.Percentile(99),
+        }
+
+
+grading_latency = LatencyTracker(window=settings.OPENROUTER_HEDGE_WINDOW)
+hedge_stats = HedgeStats()
+
+
+async def _Timed[T](call: Awaitable[T]) -> tuple[T, float]:
+    started = time.monotonic()
+    result = await call
+    return result, time.monotonic() - started
+
+
+async def CallHedged[T](
+    call: Callable[[str], Awaitable[tuple[T, LLMUsage]]],
+    label: str,
+    stage: LLMCallStage,
+) -> tuple[T, LLMUsage]:
+    """
+    `CallWithFallback`, plus a duplicate request if the first one is slower
+    than the `OPENROUTER_HEDGE_PERCENTILE` of recent latencies. The duplicate
+    goes to `OPENROUTER_HEDGE_MODELS` (by default the same models). The first
+    valid answer wins; the other request is cancelled.
+    """
+    hedge_stats.calls += 1
+
+    if not settings.OPENROUTER_HEDGE_ENABLED:
+        result, latency = await _Timed(CallWithFallback(call, label, stage))
+        grading_latency.Record(latency)
+        return result
+
+    primary = asyncio.create_task(_Timed(CallWithFallback(call, label, stage)))
+    delay = grading_latency.Percentile(settings.OPENROUTER_HEDGE_PERCENTILE)
+
+    pending: set[asyncio.Task[tuple[tuple[T, LLMUsage], float]]] = {primary}
+    hedge: asyncio.Task[tuple[tuple[T, LLMUsage], float]] | None = None
+
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+
+            if not done:
+                hedge = asyncio.create_task(
+                    _Timed(
+                        CallWithFallback(
+                            call,
+                            f"{label} [hedge]",
+                            stage,
+                            settings.OPENROUTER_HEDGE_MODELS or None,
+                        )
+                    )
+                )
+                pending.add(hedge)
+                hedge_stats.hedged += 1
+                logging.info(
+                    f"Hedged {label} after {delay:.1f}s: {hedge_stats.IntoDict()}."
+                )
+
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            # successes first: both requests may finish in the same iteration
+            for task in sorted(done, key=lambda t: t.exception() is not None):
+                if task.exception() is not None and pending:
+                    continue  # the other request may still succeed
+
+                result, latency = task.result()
+                grading_latency.Record(latency)
+
+                if task is hedge:
+                    hedge_stats.hedge_wins += 1
+                    logging.info(f"Hedge won for {label}: {hedge_stats.IntoDict()}.")
+
+                return result
+
+        raise AssertionError("unreachable")
+
+    finally:
+        for running in (primary, hedge):
+            if running is not None and not running.done():
+                running.cancel()
@@ -0,0 +1,153 @@
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from grader.db.models.grading_job import GradingJob
+from grader.db.models.submission import Submission
+from grader.llm.align import CellKey, CellMatch
+from grader.llm.cache import HashParts
+from grader.llm.convert import NotebookCell
+from grader.llm.filenames import Filenames
+from grader.services.submission import SubmissionService
+
+_MISSING = "<missing>"
+
+
+@dataclass(slots=True)
+class SubmissionState:
+    reference_hash: str
+    fingerprints: dict[str, str]  # reference cell index -> `CellFingerprints`
+
+
+def ReferenceHash(reference_path: Path) -> str:
+    """
+    Identifies the processed reference: results graded against another task
+    structure or reference text are never reused.
+    """
+    return HashParts(
+        (reference_path / Filenames.task_structure.value).read_text(encoding="utf-8"),
+        (reference_path / Filenames.llm_friendly.value).read_text(encoding="utf-8"),
+    )
+
+
+def CellFingerprints(
+    reference_count: int,
+    student_cells: list[NotebookCell],
+    matches: list[CellMatch],
+) -> dict[str, str]:
+    """
+    For every reference cell, a hash of the student cells aligned to it, plus
+    the added cells that follow it (before the next reference cell). A task
+    is unchanged since the previous submission if the fingerprints of all its
+    `cells` are. Keys are strings, as they are stored in JSON.
+    """
+    anchored: list[list[str]] = [[] for _ in range(reference_count)]
+    anchor = 0
+
+    for match in matches:
+        if match.student is None:
+            key = _MISSING
+        else:
+            key = json.dumps(CellKey(student_cells[match.student]), ensure_ascii=False)
+
+        if match.reference is not None:
+            anchor = match.reference
+        if anchor < reference_count:
+            anchored[anchor].append(key)
+
+    return {str(index): HashParts(*keys) for index, keys in enumerate(anchored)}
+
+
+def ReusableResults(
+    tasks: list[dict[str, Any]],
+    fingerprints: dict[str, str],
+    previous: Submission,
+) -> dict[str, dict[str, Any]]:
+    """
+    Previous results of the tasks whose reference cells all have the same
+    fingerprints as before. Tasks without `cells` (structures derived before
+    the field existed) are always re-graded; so is everything if a cell of no
+    task (imports, data loading) changed, as it may affect any task.
+    """
+
+    def _Unchanged(index: str) -> bool:
+        return fingerprints.get(index) == previous.fingerprints.get(index)
+
+    owned = {str(index) for task in tasks for index in task.get("cells") or []}
+    if not all(_Unchanged(index) for index in fingerprints.keys() - owned):
+        return {}
+
+    reused: dict[str, dict[str, Any]] = {}
+
+    for task in tasks:
+        cells = task.get("cells") or []
+        title = task["title"]
+        if not cells or title not in previous.results:
+            continue
+
+        if all(_Unchanged(str(index)) for index in cells):
+            reused[title] = previous.results[title]
+
+    return reused
+
+
+async def ReusePreviousResults(
+    job: GradingJob,
+    reference_path: Path,
+    state: SubmissionState,
+) -> dict[str, dict[str, Any]]:
+    """
+    Results of the chat's previous submission of the same file that stay valid
+    for this one. One chat grades many students, so a submission of another
+    file, or of an unknown one, reuses nothing.
+    """
+    if job.file_name is None:
+        return {}
+
+    previous = await SubmissionService.Create().GetLatestSubmission(
+        job.chat_id, job.file_name, state.reference_hash
+    )
+    if previous is None:
+        return {}
+
+    tasks = json.loads(
+        (reference_path / Filenames.task_structure.value).read_text(encoding="utf-8")
+    ).get("tasks", [])
+    reused = ReusableResults(tasks, state.fingerprints, previous)
+
+    logging.info(
+        f"Resubmission of '{job.file_name}' in chat {job.chat_id}: {len(reused)} of "
+        f"{len(tasks)} tasks unchanged since submission {previous.id}."
+    )
+    return reused
+
+
+async def RecordSubmission(
+    job: GradingJob,
+    student_path: Path,
+    state: SubmissionState,
+    reused: int,
+) -> None:
+    """
+    Adds the graded submission to the chat's history. The grading itself is
+    already delivered, so a failure here is only logged.
+    """
+    try:
+        results: dict[str, Any] = json.loads((student_path / "result.txt").read_text())
+
+        await SubmissionService.Create().CreateSubmission(
+            Submission(
+                chat_id=job.chat_id,
+                job_id=job.id,
+                file_name=job.file_name,
+                reference_hash=state.reference_hash,
+                fingerprints=state.fingerprints,
+                results=results,
+                reused_tasks=reused,
+                graded_tasks=len(results) - reused,
+            )
+        )
+    except Exception:
+        logging.exception(f"Failed to record submission of GradingJob(id={job.id}).")
@@ -0,0 +1,9 @@
+from aiolimiter import AsyncLimiter
+
+from grader.core.configs.settings import settings
+
+# shared by every grading path of the process, so batches cannot exceed OpenRouter limits
+openrouter_limiter = AsyncLimiter(
+    max_rate=settings.OPENROUTER_MAX_REQUESTS_PER_MINUTE,
+    time_period=60,
+)
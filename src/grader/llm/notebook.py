@@ -0,0 +1,202 @@
+import base64
+import hashlib
+import logging
+import uuid
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+import ijson
+import nbformat
+
+from grader.core.configs.settings import settings
+
+_NOTEBOOK_FORMAT = 4
+_HASH_CHARS = 16
+_IMAGE_TYPES = {"image/png": "png", "image/jpeg": "jpg"}
+_TEXT_TYPES = ("text/plain", "application/json")
+
+_CELL = "cells.item"
+_DATA = "cells.item.outputs.item.data"
+# never needed for grading, and may hold large base64 payloads
+_SKIPPED = (
+    "cells.item.metadata",
+    "cells.item.attachments",
+    "cells.item.outputs.item.metadata",
+)
+
+
+def _WriteImage(payload: str, path: Path) -> None:
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    try:
+        temp_path.write_bytes(base64.b64decode(payload))
+        temp_path.replace(path)  # never seen half-written
+    finally:
+        temp_path.unlink(missing_ok=True)  # a failed write leaves nothing behind
+
+
+@cache  # created on first use, so every process pool worker has its own
+def _Writers() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=settings.GRADING_IMAGE_WRITERS,
+        thread_name_prefix="images",
+    )
+
+
+class _ImageStore:
+    """
+    Content-addressed images of one notebook: each is named by the hash of its
+    base64 payload (whitespace aside), so a plot rendered many times is stored
+    once and referred to by the same name everywhere.
+    Decoding and writing run in the `_Writers` pool; without a directory,
+    images are only named, not written.
+    """
+
+    def __init__(self, directory: Path | None):
+        self._directory = directory
+        self._names: set[str] = set()
+        self._pending: deque[Future[None]] = deque()
+
+        self.duplicates = 0
+
+    def Add(self, chunks: list[str], mime_type: str) -> str:
+        """
+        Returns the image's filename, or "" (no image) for an empty payload.
+        """
+        # without whitespace, so line wrapping does not change the hash
+        payload = "".join("".join(chunks).split())
+        if not payload:
+            return ""
+
+        digest = hashlib.sha256(payload.encode("ascii")).hexdigest()
+        name = f"{digest[:_HASH_CHARS]}.{_IMAGE_TYPES[mime_type]}"
+
+        if name in self._names:
+            self.duplicates += 1
+            return name
+        self._names.add(name)
+
+        if self._directory is None or (self._directory / name).exists():
+            return name
+
+        # bounded, so memory stays flat however many plots the notebook has
+        while len(self._pending) >= 2 * settings.GRADING_IMAGE_WRITERS:
+            self._pending.popleft().result()
+        self._pending.append(
+            _Writers().submit(_WriteImage, payload, self._directory / name)
+        )
+
+        return name
+
+    def Wait(self) -> int:
+        """
+        Waits for all writes, raising the first failure. Returns the number
+        of distinct images.
+        """
+        while self._pending:
+            self._pending.popleft().result()
+        return len(self._names)
+
+
+def _Skipped(prefix: str) -> bool:
+    if prefix.startswith(_SKIPPED):
+        return True
+
+    if prefix.startswith(_DATA + "."):
+        mime_type = prefix[len(_DATA) + 1 :]
+        return not any(
+            mime_type == kept or mime_type.startswith(kept + ".")
+            for kept in (*_TEXT_TYPES, *_IMAGE_TYPES)
+        )
+
+    return False
+
+
+def _Join(value: Any) -> Any:
+    return "".join(value) if isinstance(value, list) else value
+
+
+def _NormalizeCell(cell: dict[str, Any]) -> dict[str, Any]:
+    cell["source"] = _Join(cell.get("source", ""))
+    return cell
+
+
+def _IterStreamed(ipynb_path: Path, images: _ImageStore) -> Iterator[dict[str, Any]]:
+    builder: ijson.ObjectBuilder | None = None
+    image_chunks: list[str] = []
+
+    with open(ipynb_path, "rb") as file:
+        for prefix, event, value in ijson.parse(file, use_float=True):
+            if not prefix.startswith(_CELL):
+                continue
+
+            if prefix == _CELL and event == "start_map":
+                builder = ijson.ObjectBuilder()
+
+            if builder is None or _Skipped(prefix):
+                continue
+
+            if prefix.startswith(_DATA + "."):
+                mime_type = prefix[len(_DATA) + 1 :].removesuffix(".item")
+                if mime_type in _IMAGE_TYPES:
+                    # the image goes to the store; the cell keeps its filename instead
+                    if event == "string":
+                        image_chunks.append(value)
+                    # a single string, or the end of a list of lines
+                    if prefix == f"{_DATA}.{mime_type}" and event != "start_array":
+                        builder.event("string", images.Add(image_chunks, mime_type))
+                        image_chunks = []
+                    continue
+
+            builder.event(event, value)
+
+            if prefix == _CELL and event == "end_map":
+                yield _NormalizeCell(builder.value)
+                builder = None
+
+
+def _IterConverted(ipynb_path: Path, images: _ImageStore) -> Iterator[dict[str, Any]]:
+    notebook = nbformat.read(ipynb_path, as_version=_NOTEBOOK_FORMAT)
+
+    for cell in notebook.cells:
+        for output in cell.get("outputs", []):
+            data = output.get("data", {})
+            for mime_type in _IMAGE_TYPES:
+                if data.get(mime_type):
+                    data[mime_type] = images.Add([data[mime_type]], mime_type)
+        yield _NormalizeCell(cell)
+
+
+def IterNotebookCells(
+    ipynb_path: Path, image_directory: Path | None
+) -> Iterator[dict[str, Any]]:
+    """
+    Yields the cells of a notebook one at a time, as plain nbformat 4 dicts,
+    without loading the whole document: the file is parsed as a stream of
+    JSON events. Embedded PNG/JPEG outputs are replaced by content-addressed
+    filenames (see `_ImageStore`) and written to `image_directory`, if given,
+    by a thread pool. Cell and output metadata, attachments and unused mime
+    types (HTML, SVG, widgets) are skipped. Nothing is validated.
+
+    Notebooks older than nbformat 4 have no top-level `cells`; they are small
+    and are converted with `nbformat` instead.
+    """
+    images = _ImageStore(image_directory)
+
+    streamed = False
+    for cell in _IterStreamed(ipynb_path, images):
+        streamed = True
+        yield cell
+
+    if not streamed:
+        yield from _IterConverted(ipynb_path, images)
+
+    distinct = images.Wait()
+    if images.duplicates:
+        logging.info(
+            f"Images of {ipynb_path}: {distinct} distinct, "
+            f"{images.duplicates} duplicates not stored again."
+        )
@@ -0,0 +1,124 @@
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from grader.core.configs.settings import settings
+from grader.llm.align import CellMatch
+from grader.llm.convert import NotebookCell, ParsedNotebook
+from grader.llm.filenames import Filenames
+
+_NUMBER = re.compile(r"(?<![\w.])[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?(?![\w.])")
+# OutputLimiter markers: the visible numbers are not the whole output
+_TRUNCATION_MARKERS = ("[... ", "... [+")
+
+
+def _ExtractNumbers(cell: NotebookCell) -> list[float] | None:
+    """
+    All numbers in the cell outputs, in order.
+    None if the outputs are missing, truncated or contain an error traceback.
+    """
+    texts = [str(text) for text in cell.output_texts]
+    if not texts:
+        return None
+
+    joined = "\n".join(texts)
+    if "Traceback" in joined or any(marker in joined for marker in _TRUNCATION_MARKERS):
+        return None
+
+    return [float(number) for number in _NUMBER.findall(joined)]
+
+
+def CheckNumericTasks(
+    reference_path: Path,
+    reference_cells: list[NotebookCell],
+    student: ParsedNotebook,
+    matches: list[CellMatch],
+) -> dict[str, dict[str, Any]]:
+    """
+    Auto-verifies tasks whose result is a plain number in the reference outputs.
+    For every task with `outputCells`, the numbers printed by those reference cells
+    are compared with the numbers printed by the student cells aligned to them
+    (`matches` from `AlignCells`), within
+    `GRADING_NUMERIC_RTOL` / `GRADING_NUMERIC_ATOL`.
+    Returns grading results (`score` = `maximumScore`) for fully matching tasks only;
+    everything else is left to the LLM.
+    """
+    tasks = json.loads(
+        (reference_path / Filenames.task_structure.value).read_text(encoding="utf-8")
+    ).get("tasks", [])
+    student_cells = student.cells
+
+    student_of = {
+        match.reference: match.student
+        for match in matches
+        if match.reference is not None and match.student is not None
+    }
+
+    candidates: list[dict[str, Any]] = []
+    reference_values: list[float] = []
+    student_values: list[float] = []
+    task_ids: list[int] = []
+
+    for task in tasks:
+        cells = task.get("outputCells") or []
+        pairs: list[tuple[list[float], list[float]]] = []
+
+        for cell_index in cells:
+            if (
+                not 0 <= cell_index < len(reference_cells)
+                or cell_index not in student_of
+            ):
+                break
+            expected = _ExtractNumbers(reference_cells[cell_index])
+            actual = _ExtractNumbers(student_cells[student_of[cell_index]])
+            if not expected or actual is None or len(actual) != len(expected):
+                break
+            pairs.append((expected, actual))
+        else:
+            if not pairs:
+                continue
+
+            for expected, actual in pairs:
+                reference_values.extend(expected)
+                student_values.extend(actual)
+                task_ids.extend([len(candidates)] * len(expected))
+            candidates.append(task)
+
+    if not candidates:
+        return {}
+
+    # one vectorized comparison for all candidate tasks, then mismatches per task
+    close = np.isclose(
+        np.asarray(student_values),
+        np.asarray(reference_values),
+        rtol=settings.GRADING_NUMERIC_RTOL,
+        atol=settings.GRADING_NUMERIC_ATOL,
+        equal_nan=True,
+    )
+    mismatches = np.bincount(
+        np.asarray(task_ids), weights=~close, minlength=len(candidates)
+    )
+
+    verified: dict[str, dict[str, Any]] = {}
+    for task, mismatch in zip(candidates, mismatches, strict=True):
+        if mismatch:
+            continue
+        shown = ", ".join(str(index) for index in task["outputCells"])
+        verified[task["title"]] = {
+            "score": task["maximumScore"],
+            "comment": (
+                "Проверено автоматически: числовой результат совпадает с эталоном "
+                f"(ячейки эталона: {shown})."
+            ),
+        }
+
+    logging.info(
+        f"Numeric check of {student.source_file}: {len(verified)} of {len(tasks)} tasks "
+        f"auto-verified ({len(reference_values)} values compared)."
+    )
+
+    return verified
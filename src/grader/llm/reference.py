@@ -1,11 +1,21 @@
+import hashlib
+import json
+import logging
+import shutil
+import time
+import uuid
 from pathlib import Path
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
-from grader.core.configs.paths import PATH_STRUCTURE_PROMPT
-from grader.core.configs.settings import settings
-from grader.llm.convert import ProcessJSONToLLMFriendlyText, ProcessRawJupyterToJSON
+from grader.core.configs.paths import DIR_REFERENCES, PATH_STRUCTURE_PROMPT
+from grader.db.models.llm_call import LLMCallStage
+from grader.llm.client import openrouter
+from grader.llm.convert import ConvertNotebook
+from grader.llm.executor import grading_executor
 from grader.llm.filenames import Filenames
+from grader.llm.retry import CallWithFallback
+from grader.llm.usage import LLMUsage
 
 _schema = {
     "type": "object",
@@ -31,8 +41,24 @@ _schema = {
                         "minimum": 0,
                         "description": "Max score available for this task. Use notebook's grading if present; otherwise assign a reasonable max.",
                     },
+                    "cells": {
+                        "type": "array",
+                        "items": {"type": "integer", "minimum": 0},
+                        "description": "Indices of all cells that belong to this task: its statement, the code solving it and its outputs.",
+                    },
+                    "outputCells": {
+                        "type": "array",
+                        "items": {"type": "integer", "minimum": 0},
+                        "description": "Indices of code cells whose printed output is the expected numeric result of this task. Empty if the result is not just numbers.",
+                    },
                 },
-                "required": ["title", "description", "maximumScore"],
+                "required": [
+                    "title",
+                    "description",
+                    "maximumScore",
+                    "cells",
+                    "outputCells",
+                ],
                 "additionalProperties": False,
             },
         }
@@ -44,47 +70,119 @@ _schema = {
 
 _structure_system_prompt = PATH_STRUCTURE_PROMPT.read_text()
 
+# artifacts that fully describe a processed reference; shared across chats
+_STORED_ARTIFACTS = (
+    Filenames.parsed_json,
+    Filenames.llm_friendly,
+    Filenames.task_structure,
+)
+
 
-def DefineReferenceTaskStructure(
-    client: OpenAI,
-    model: str,
+async def DefineReferenceTaskStructure(
+    client: AsyncOpenAI,
     directory_path: Path,
 ) -> None:
     llm_friendly_ipynb_path = directory_path / Filenames.llm_friendly.value
     llm_friendly_ipynb = llm_friendly_ipynb_path.read_text()
 
-    resp = client.responses.create(
-        # model="gpt-5",
-        # model="gpt-5-nano",
-        model=model,
-        input=[
-            {"role": "system", "content": _structure_system_prompt},
-            {"role": "user", "content": llm_friendly_ipynb},
-        ],
-        text={
-            "format": {
-                "type": "json_schema",
-                "name": "task_structure",
-                "strict": True,
-                "schema": _schema,
-            }
-        },
+    async def _Attempt(model: str) -> tuple[str, LLMUsage]:
+        started = time.monotonic()
+        resp = await client.responses.create(
+            # model="gpt-5",
+            # model="gpt-5-nano",
+            model=model,
+            input=[
+                {"role": "system", "content": _structure_system_prompt},
+                {"role": "user", "content": llm_friendly_ipynb},
+            ],
+            text={
+                "format": {
+                    "type": "json_schema",
+                    "name": "task_structure",
+                    "strict": True,
+                    "schema": _schema,
+                }
+            },
+        )
+        json.loads(resp.output_text)  # broken output is retried
+        return resp.output_text, LLMUsage.FromResponse(
+            resp, latency=time.monotonic() - started
+        )
+
+    output_text, _ = await CallWithFallback(
+        _Attempt, f"structure of {directory_path}", LLMCallStage.structure
     )
 
     task_structure_path = directory_path / Filenames.task_structure.value
-    task_structure_path.write_text(resp.output_text)
+    task_structure_path.write_text(output_text)
+
+
+def ConvertReferenceNotebook(directory_path: Path) -> None:
+    # the parsed cells and the text are stored artifacts, read by every submission
+    ConvertNotebook(directory_path, write_files=True)
+
+
+async def StructureReference(directory_path: Path) -> None:
+    await DefineReferenceTaskStructure(openrouter.client, directory_path)
+
+
+def _NotebookHash(directory_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(directory_path / Filenames.ipynb.value, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
 
 
-def ProcessReference(
+def RestoreReference(directory_path: Path) -> bool:
+    """
+    Copies the artifacts of an already processed, byte-identical reference
+    from the shared store. Returns False if the notebook has not been seen yet.
+    """
+    stored_path = DIR_REFERENCES / _NotebookHash(directory_path)
+
+    if not all((stored_path / name.value).exists() for name in _STORED_ARTIFACTS):
+        return False
+
+    for name in _STORED_ARTIFACTS:
+        shutil.copyfile(stored_path / name.value, directory_path / name.value)
+
+    logging.info(f"Reference restored from store: {stored_path.name[:12]}.")
+    return True
+
+
+def StoreReference(directory_path: Path) -> None:
+    """
+    Publishes the artifacts of a processed reference under its content hash.
+    The directory is assembled aside and renamed, so readers never see it partially;
+    an existing entry is never replaced, as another worker may be restoring it.
+    """
+    stored_path = DIR_REFERENCES / _NotebookHash(directory_path)
+    if stored_path.exists():
+        return
+    temp_path = DIR_REFERENCES / f".{stored_path.name}.{uuid.uuid4().hex}"
+
+    temp_path.mkdir(parents=True)
+    for name in _STORED_ARTIFACTS:
+        shutil.copyfile(directory_path / name.value, temp_path / name.value)
+
+    try:
+        temp_path.rename(stored_path)
+    except OSError:  # stored concurrently by another worker
+        shutil.rmtree(temp_path, ignore_errors=True)
+        return
+
+    logging.info(f"Reference stored: {stored_path.name[:12]}.")
+
+
+async def ProcessReference(
     directory_path: Path,
+    force: bool = False,
 ) -> None:
-    ProcessRawJupyterToJSON(directory_path)
-    ProcessJSONToLLMFriendlyText(directory_path)
+    if not force and await grading_executor.Run(RestoreReference, directory_path):
+        return
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=settings.OPENROUTER_API_KEY.get_secret_value(),
-    )
-    # model = "gpt-5-nano"
-    model = "deepseek/deepseek-v3.2"
-    DefineReferenceTaskStructure(client, model, directory_path)
+    await grading_executor.Run(ConvertReferenceNotebook, directory_path)
+    await StructureReference(directory_path)
+    await grading_executor.Run(StoreReference, directory_path)
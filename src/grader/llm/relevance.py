@@ -0,0 +1,228 @@
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from grader.core.configs.settings import settings
+from grader.llm.align import CellMatch, Ranges
+from grader.llm.convert import NotebookCell, RenderCellText
+
+# words of any script; `_` splits identifiers, so `train_test_split` matches "split"
+_TOKEN = re.compile(r"[^\W_]+")
+_K1 = 1.5
+_B = 0.75
+# cells scoring below this share of the best one match only on common words
+_MIN_SCORE_SHARE = 0.5
+# references whose task queries are kept, e.g. several courses graded at once
+_QUERIES_CACHED = 32
+
+
+def _Tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _Terms(query: str) -> frozenset[str]:
+    return frozenset(_Tokens(query))
+
+
+def _CellText(cell: NotebookCell) -> str:
+    return "\n".join([cell.source, *map(str, cell.output_texts)])
+
+
+class CellIndex:
+    """
+    Okapi BM25 over the cells of one notebook, built once per conversion.
+    Each term keeps its postings as arrays, so a query scores all cells with
+    a few vectorized operations per query term.
+    """
+
+    def __init__(self, cells: list[NotebookCell]):
+        counts = [Counter(_Tokens(_CellText(cell))) for cell in cells]
+
+        lengths = np.array([sum(c.values()) for c in counts], dtype=float)
+        average = float(lengths.mean()) if len(cells) else 0.0
+        self._norms = _K1 * (1 - _B + _B * lengths / (average or 1.0))
+        self._size = len(cells)
+
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        for position, cell_counts in enumerate(counts):
+            for term, frequency in cell_counts.items():
+                positions, frequencies = postings.setdefault(term, ([], []))
+                positions.append(position)
+                frequencies.append(frequency)
+
+        self._postings = {
+            term: (np.array(positions), np.array(frequencies, dtype=float))
+            for term, (positions, frequencies) in postings.items()
+        }
+
+    def Scores(self, query: str) -> np.ndarray:
+        return self._TermScores(_Terms(query))
+
+    def _TermScores(self, terms: frozenset[str]) -> np.ndarray:
+        scores = np.zeros(self._size)
+
+        for term in terms:
+            if term not in self._postings:
+                continue
+            positions, frequencies = self._postings[term]
+            found = len(positions)
+            idf = math.log(1 + (self._size - found + 0.5) / (found + 0.5))
+            scores[positions] += (
+                idf * frequencies * (_K1 + 1) / (frequencies + self._norms[positions])
+            )
+
+        return scores
+
+    def Top(self, query: str, k: int) -> list[int]:
+        """
+        Positions of at most `k` best-scoring cells, best first. Cells scoring
+        under `_MIN_SCORE_SHARE` of the best one are never returned.
+        """
+        return self.TopTerms(_Terms(query), k)
+
+    def TopTerms(self, terms: frozenset[str], k: int) -> list[int]:
+        """
+        `Top` for a query already split into terms (see `TaskQuery`).
+        """
+        scores = self._TermScores(terms)
+        if not len(scores) or scores.max() <= 0:
+            return []
+
+        threshold = _MIN_SCORE_SHARE * scores.max()
+        ranked = np.argsort(-scores, kind="stable")[:k]
+        return [int(position) for position in ranked if scores[position] >= threshold]
+
+
+@dataclass(slots=True)
+class TaskQuery:
+    owned: list[int]  # the task's reference cells
+    terms: frozenset[str]  # of its title, description and reference cells
+
+
+def _BuildTaskQueries(
+    tasks: list[dict[str, Any]], reference_cells: list[NotebookCell]
+) -> dict[str, TaskQuery]:
+    top_k = settings.GRADING_RELEVANCE_TOP_K
+    reference_index = CellIndex(reference_cells)
+
+    queries: dict[str, TaskQuery] = {}
+    for task in tasks:
+        statement = f"{task['title']}\n{task.get('description', '')}"
+        owned = [
+            index for index in task.get("cells") or [] if index < len(reference_cells)
+        ] or reference_index.Top(statement, top_k)
+
+        query = "\n".join(
+            [statement, *(_CellText(reference_cells[index]) for index in owned)]
+        )
+        queries[task["title"]] = TaskQuery(owned, _Terms(query))
+
+    return queries
+
+
+_queries: OrderedDict[str, dict[str, TaskQuery]] = OrderedDict()
+_queries_lock = threading.Lock()
+
+
+def TaskQueries(
+    reference_hash: str,
+    tasks: list[dict[str, Any]],
+    reference_cells: list[NotebookCell],
+) -> dict[str, TaskQuery]:
+    """
+    The query of every task of a processed reference (see `ReferenceHash`).
+    They depend on the reference only, so they are built once per process for
+    all its submissions, a batch included, and the `_QUERIES_CACHED` most
+    recently used references are kept.
+    """
+    with _queries_lock:
+        queries = _queries.get(reference_hash)
+        if queries is not None:
+            _queries.move_to_end(reference_hash)
+            return queries
+
+    queries = _BuildTaskQueries(tasks, reference_cells)
+
+    with _queries_lock:
+        _queries[reference_hash] = queries
+        while len(_queries) > _QUERIES_CACHED:
+            _queries.popitem(last=False)
+
+    return queries
+
+
+def SelectRelevantCells(
+    tasks: list[dict[str, Any]],
+    queries: dict[str, TaskQuery],
+    student_cells: list[NotebookCell],
+    matches: list[CellMatch],
+    candidates: list[int],
+) -> dict[str, list[int]] | None:
+    """
+    For every task, the student cells (positions, among `candidates`) that the
+    LLM needs: those aligned to the task's reference cells, then the best BM25
+    matches for its query (`TaskQueries`), up to `GRADING_RELEVANCE_TOP_K`
+    cells and `GRADING_RELEVANCE_TASK_CHARS` of text. The task's reference
+    cells are its `cells`, or for structures without them, the best BM25
+    matches among the reference cells.
+
+    Returns None, meaning the whole notebook is sent, for notebooks with fewer
+    than `GRADING_RELEVANCE_MIN_CELLS` candidates, or if some task matches no
+    cell at all, not even one identical to the reference (it may be solved in
+    words the index cannot match).
+    """
+    if len(candidates) < settings.GRADING_RELEVANCE_MIN_CELLS:
+        return None
+
+    top_k = settings.GRADING_RELEVANCE_TOP_K
+    student_index = CellIndex([student_cells[position] for position in candidates])
+
+    aligned: dict[int, list[int]] = {}
+    for match in matches:
+        if match.reference is not None and match.student is not None:
+            aligned.setdefault(match.reference, []).append(match.student)
+    is_candidate = set(candidates)
+
+    selected: dict[str, list[int]] = {}
+    for task in tasks:
+        query = queries[task["title"]]
+
+        anchors = [
+            position
+            for index in query.owned
+            for position in aligned.get(index, [])
+            if position in is_candidate
+        ]
+        ranked = [
+            candidates[rank] for rank in student_index.TopTerms(query.terms, top_k)
+        ]
+
+        cells: list[int] = []
+        budget = settings.GRADING_RELEVANCE_TASK_CHARS
+        for position in dict.fromkeys([*anchors, *ranked]):
+            size = sum(map(len, RenderCellText(student_cells[position])))
+            if cells and size > budget:
+                continue
+            cells.append(position)
+            budget -= size
+
+        if not cells and not any(aligned.get(index) for index in query.owned):
+            return None  # not even shown as identical to the reference
+        selected[task["title"]] = sorted(cells)
+
+    return selected
+
+
+def RenderTaskCells(selection: dict[str, list[int]]) -> str:
+    """
+    The task -> cells map put before a notebook rendered with only the
+    selected cells.
+    """
+    lines = ["Cells relevant to each task (student cells):"]
+    lines.extend(f"- {title}: {Ranges(cells)}" for title, cells in selection.items())
+    return "\n".join(lines) + "\n\n"
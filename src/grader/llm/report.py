@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+import markdown
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+
+from grader.core.configs.settings import settings
+
+_STYLESHEET = """
+@page { size: A4; margin: 2cm; }
+body { font-family: "DejaVu Sans", sans-serif; font-size: 11pt; }
+table { border-collapse: collapse; }
+th, td { border: 1px solid #999; padding: 2pt 6pt; }
+"""
+
+_SUMMARY_LIMIT = 3800  # under Telegram's 4096, leaving room for notes appended
+_OMITTED_RESERVE = 60  # for the line counting the tasks that did not fit
+
+
+def ScoreRows(
+    tasks_data: dict[str, Any], results_data: dict[str, Any]
+) -> list[tuple[str, Any, Any]]:
+    """
+    (title, score, maximum) per task, as in the report's score table.
+    """
+    return [
+        (
+            task["title"],
+            results_data.get(task["title"], {}).get("score", 0),
+            task["maximumScore"],
+        )
+        for task in tasks_data["tasks"]
+    ]
+
+
+def ScoreSummary(tasks_path: Path, results_path: Path) -> str:
+    """
+    Plain-text counterpart of the report's score table, sent to the chat as
+    soon as grading finishes.
+    """
+    tasks_data: dict[str, Any] = json.loads(tasks_path.read_text(encoding="utf-8"))
+    results_data: dict[str, Any] = json.loads(results_path.read_text(encoding="utf-8"))
+    rows = ScoreRows(tasks_data, results_data)
+
+    header = ["📊 Сводная таблица баллов", ""]
+    task_lines = [
+        f"• {title}: {score} / {max_score}" for title, score, max_score in rows
+    ]
+
+    total = sum(score for _, score, _ in rows if isinstance(score, int | float))
+    maximum = sum(
+        max_score for *_, max_score in rows if isinstance(max_score, int | float)
+    )
+    footer = ["", f"Итого: {total:g} / {maximum:g}"]
+
+    # whole task lines up to the limit; the total is always kept
+    room = _SUMMARY_LIMIT - len("\n".join([*header, *footer])) - _OMITTED_RESERVE
+    kept = 0
+    for line in task_lines:
+        room -= len(line) + 1
+        if room < 0:
+            break
+        kept += 1
+
+    if kept < len(task_lines):
+        omitted = len(task_lines) - kept
+        task_lines = [*task_lines[:kept], f"… и еще задач: {omitted}"]
+
+    return "\n".join([*header, *task_lines, *footer])
+
+
+def ReportMarkdown(tasks_data: dict[str, Any], results_data: dict[str, Any]) -> str:
+    """
+    Algorithmically generate markdown report and score table
+    from task descriptions and grading results.
+    """
+    md_lines = ["# Отчет по проверке\n"]
+
+    for task in tasks_data["tasks"]:
+        title = task["title"]
+        description = task["description"]
+        max_score = task["maximumScore"]
+
+        result = results_data.get(title, {})
+        comment = result.get("comment", "Комментарий отсутствует.")
+        score = result.get("score", 0)
+
+        md_lines.extend(
+            [
+                f"## {title}\n",
+                f"**Условие:**  \n{description}\n",
+                f"**Комментарий по проверке:**  \n{comment}\n",
+                f"**Потенциальный балл:** {score} / {max_score}\n",
+            ]
+        )
+
+    md_lines.append("\n## Сводная таблица баллов\n")
+    md_lines.append("| Задача | Балл | Максимум |")
+    md_lines.append("|-------|------|----------|")
+
+    for title, score, max_score in ScoreRows(tasks_data, results_data):
+        md_lines.append(f"| {title} | {score} | {max_score} |")
+
+    return "\n".join(md_lines)
+
+
+def ReportHTML(tasks_path: Path, results_path: Path) -> str:
+    tasks_data: dict[str, Any] = json.loads(tasks_path.read_text(encoding="utf-8"))
+    results_data: dict[str, Any] = json.loads(results_path.read_text(encoding="utf-8"))
+
+    return markdown.markdown(
+        ReportMarkdown(tasks_data, results_data), extensions=["tables", "fenced_code"]
+    )
+
+
+@dataclass(slots=True)
+class _Styles:
+    font_config: FontConfiguration
+    stylesheets: list[CSS]
+
+
+@cache  # once per worker process
+def _LoadStyles() -> _Styles:
+    font_config = FontConfiguration()
+    return _Styles(font_config, [CSS(string=_STYLESHEET, font_config=font_config)])
+
+
+def _WarmUp() -> None:
+    # the first document pays for fontconfig and Pango setup; do it before any job.
+    # A failing initializer would break the whole pool, so the worker starts
+    # cold instead, and each render reports its own error.
+    try:
+        styles = _LoadStyles()
+        HTML(string="<p>Отчет</p>").write_pdf(
+            stylesheets=styles.stylesheets, font_config=styles.font_config
+        )
+    except Exception:
+        logging.exception("Failed to warm up a report worker.")
+
+
+def _Ready() -> None:
+    pass
+
+
+def RenderReportPDF(tasks_path: Path, results_path: Path, pdf_path: Path) -> None:
+    styles = _LoadStyles()
+    HTML(string=ReportHTML(tasks_path, results_path)).write_pdf(
+        str(pdf_path), stylesheets=styles.stylesheets, font_config=styles.font_config
+    )
+
+
+class ReportRenderer:
+    """
+    Renders PDF reports in a process pool of its own: WeasyPrint is CPU-bound
+    and holds the GIL, and its font and stylesheet setup is done once per
+    worker (`_WarmUp`) instead of once per report. Jobs queue in the pool, so
+    a batch renders `workers` reports at a time while grading goes on.
+    A worker that dies (segfault, OOM kill) breaks the pool; it is then
+    replaced, and the reports it failed are rendered once more.
+    """
+
+    def __init__(self, workers: int):
+        self._workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+
+    def Start(self) -> None:
+        self._pool = ProcessPoolExecutor(max_workers=self._workers, initializer=_WarmUp)
+        # workers are spawned on demand; start (and warm) all of them now
+        for _ in range(self._workers):
+            self._pool.submit(_Ready)
+
+        logging.info(f"# Report renderer started: {self._workers} workers.")
+
+    async def Shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+        logging.info("# Report renderer stopped.")
+
+    async def Render(
+        self, tasks_path: Path, results_path: Path, pdf_path: Path
+    ) -> None:
+        assert self._pool is not None
+
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        try:
+            await loop.run_in_executor(
+                pool, RenderReportPDF, tasks_path, results_path, pdf_path
+            )
+            return
+        except BrokenProcessPool:
+            logging.exception("Report worker died, restarting the pool.")
+
+        # reports in flight fail together; the first one replaces the pool
+        if self._pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.Start()
+        assert self._pool is not None
+
+        await loop.run_in_executor(
+            self._pool, RenderReportPDF, tasks_path, results_path, pdf_path
+        )
+
+
+report_renderer = ReportRenderer(workers=settings.GRADING_REPORT_WORKERS)
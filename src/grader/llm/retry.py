@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+
+import openai
+
+from grader.core.configs.settings import settings
+from grader.db.models.llm_call import LLMCallStage, LLMCallStatus
+from grader.llm.accounting import RecordLLMCall
+from grader.llm.limiter import openrouter_limiter
+from grader.llm.usage import LLMUsage
+
+_RETRYABLE_STATUSES = {408, 409, 425, 429}
+_SERVER_ERROR = 500
+
+
+class LLMUnavailableError(RuntimeError):
+    """
+    Every configured model failed or has its circuit open.
+    """
+
+
+class LLMOutputError(RuntimeError):
+    """
+    The model answered, but unusably: a broken stream or missing results.
+    Retried like a transient failure.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a model after `failures` consecutive failures.
+    After `reset_seconds` one trial request is let through (half-open):
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failures: int, reset_seconds: float):
+        self._failures = failures
+        self._reset_seconds = reset_seconds
+
+        self._consecutive = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def in_trial(self) -> bool:
+        return self._trial
+
+    @property
+    def retry_in(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self._reset_seconds - time.monotonic())
+
+    def Allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self._trial or self.retry_in > 0:
+            return False
+
+        self._trial = True
+        return True
+
+    def ReleaseTrial(self) -> None:
+        """
+        Ends the half-open trial without a verdict (cancelled, or rejected
+        for reasons unrelated to the model's health): the next request is
+        let through as a new trial.
+        """
+        self._trial = False
+
+    def RecordSuccess(self) -> None:
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial = False
+
+    def RecordFailure(self) -> bool:
+        """
+        Returns True if this failure opened the circuit.
+        """
+        self._consecutive += 1
+        self._trial = False
+
+        if self._consecutive >= self._failures:
+            opened = self._opened_at is None
+            self._opened_at = time.monotonic()
+            return opened
+
+        return False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def _Breaker(model: str) -> CircuitBreaker:
+    return _breakers.setdefault(
+        model,
+        CircuitBreaker(
+            failures=settings.OPENROUTER_BREAKER_FAILURES,
+            reset_seconds=settings.OPENROUTER_BREAKER_RESET_SECONDS,
+        ),
+    )
+
+
+def _IsRetryable(error: Exception) -> bool:
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return (
+            error.status_code in _RETRYABLE_STATUSES
+            or error.status_code >= _SERVER_ERROR
+        )
+    # broken streams and malformed structured output
+    return isinstance(error, LLMOutputError | json.JSONDecodeError)
+
+
+def _RetryAfter(error: Exception) -> float | None:
+    if not isinstance(error, openai.APIStatusError):
+        return None
+
+    headers = error.response.headers
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _Backoff(attempt: int, error: Exception) -> float:
+    """
+    Full-jitter exponential backoff; the server's `Retry-After` takes precedence.
+    """
+    retry_after = _RetryAfter(error)
+    if retry_after is not None:
+        return min(retry_after, settings.OPENROUTER_BACKOFF_MAX_SECONDS)
+
+    ceiling = min(
+        settings.OPENROUTER_BACKOFF_MAX_SECONDS,
+        settings.OPENROUTER_BACKOFF_BASE_SECONDS * 2**attempt,
+    )
+    return random.uniform(0, ceiling)  # noqa: S311
+
+
+async def _RecordError(
+    error: Exception, model: str, stage: LLMCallStage, started: float | None
+) -> bool:
+    """
+    Records a failed attempt. Returns True if it is worth retrying; only such
+    failures count against the model's circuit, as a rejected request
+    (400, 401, ...) says nothing about the model's health.
+    """
+    await RecordLLMCall(
+        stage,
+        model,
+        LLMCallStatus.error,
+        LLMUsage(latency=time.monotonic() - (started or time.monotonic())),
+        error=repr(error),
+    )
+
+    retryable = _IsRetryable(error)
+    if retryable and _Breaker(model).RecordFailure():
+        logging.error(f"Circuit opened for model '{model}'.")
+
+    return retryable
+
+
+async def CallWithFallback[T](
+    call: Callable[[str], Awaitable[tuple[T, LLMUsage]]],
+    label: str,
+    stage: LLMCallStage,
+    models: list[str] | None = None,
+) -> tuple[T, LLMUsage]:
+    """
+    Runs `call(model)` for `models` (by default `OPENROUTER_MODELS`) in order.
+    Transient failures (429, 5xx, timeouts, broken output) are retried with
+    backoff up to `OPENROUTER_RETRY_ATTEMPTS` times per model, then the next
+    model is tried; other errors move on to the next model right away.
+    Models whose circuit is open are skipped. If all of them are open,
+    waits once for the first one to half-open.
+    Every attempt passes through the shared OpenRouter rate limiter
+    and is recorded in `llm_calls`.
+    """
+    models = models or settings.OPENROUTER_MODELS
+    last_error: Exception | None = None
+    waited = False
+
+    while True:
+        tried = False
+
+        for model in models:
+            breaker = _Breaker(model)
+            if not breaker.Allow():
+                continue
+            tried = True
+
+            # a half-open trial is released however this model's attempts end
+            trial = breaker.in_trial
+            try:
+                for attempt in range(settings.OPENROUTER_RETRY_ATTEMPTS):
+                    started: float | None = None
+                    try:
+                        async with openrouter_limiter:
+                            started = time.monotonic()
+                            result, usage = await call(model)
+
+                    except asyncio.CancelledError:  # the other hedged request won
+                        if started is None:  # still waiting for the rate limiter
+                            raise
+                        await asyncio.shield(
+                            RecordLLMCall(
+                                stage,
+                                model,
+                                LLMCallStatus.cancelled,
+                                LLMUsage(latency=time.monotonic() - started),
+                            )
+                        )
+                        raise
+
+                    except Exception as e:
+                        last_error = e
+                        retryable = await _RecordError(e, model, stage, started)
+
+                        final = attempt + 1 == settings.OPENROUTER_RETRY_ATTEMPTS
+                        logging.warning(
+                            f"LLM call {label} via '{model}' failed, attempt {attempt + 1}: {e!r}."
+                        )
+                        if not retryable or final or not breaker.Allow():
+                            break
+
+                        await asyncio.sleep(_Backoff(attempt, e))
+                        continue
+
+                    breaker.RecordSuccess()
+                    await RecordLLMCall(stage, model, LLMCallStatus.ok, usage)
+                    if model != models[0]:
+                        logging.warning(
+                            f"LLM call {label} served by fallback '{model}'."
+                        )
+                    return result, usage
+
+            finally:
+                if trial:
+                    breaker.ReleaseTrial()
+
+        if tried or waited:
+            break
+
+        waited = True
+        delay = min(_Breaker(model).retry_in for model in models)
+        logging.warning(f"All LLM circuits open, waiting {delay:.0f}s for {label}.")
+        await asyncio.sleep(delay)
+
+    raise LLMUnavailableError(
+        f"LLM call {label} failed on all models: {models}."
+    ) from last_error
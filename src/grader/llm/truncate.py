@@ -0,0 +1,160 @@
+import re
+from dataclasses import asdict, dataclass
+from typing import Any
+
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")  # colored tracebacks
+_CHARS_MARKER_RESERVE = 40
+
+
+@dataclass
+class TruncationReport:
+    outputs_total: int = 0
+    outputs_truncated: int = 0
+    chars_total: int = 0
+    chars_dropped: int = 0
+    lines_dropped: int = 0
+
+    def IntoDict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class OutputLimiter:
+    """
+    Bounds cell outputs before they reach the LLM:
+    - renders carriage returns like a terminal (progress bars keep their last state),
+    - cuts overlong lines,
+    - collapses runs of identical lines into one line with a repeat count,
+    - keeps only the head and tail lines with an elision marker,
+    - enforces per-cell and per-notebook character budgets.
+    One limiter is used per notebook; `report` accumulates what was dropped.
+    """
+
+    def __init__(
+        self,
+        head_lines: int,
+        tail_lines: int,
+        max_line_chars: int,
+        max_cell_chars: int,
+        max_notebook_chars: int,
+    ):
+        self._head_lines = head_lines
+        self._tail_lines = tail_lines
+        self._max_line_chars = max_line_chars
+        self._max_cell_chars = max_cell_chars
+
+        self._notebook_left = max_notebook_chars
+        self.report = TruncationReport()
+
+    def LimitCell(self, texts: list[str]) -> list[str]:
+        """
+        Limits all outputs of one cell, sharing the cell budget between them.
+        """
+        budget = min(self._max_cell_chars, self._notebook_left)
+        # which budget the cell runs out of, for the omission marker
+        exhausted = "notebook" if self._notebook_left < self._max_cell_chars else "cell"
+        limited: list[str] = []
+
+        for text in texts:
+            lines = [self._RenderLine(line) for line in text.rstrip().split("\n")]
+            rendered = "\n".join(lines)
+
+            self.report.outputs_total += 1
+            self.report.chars_total += len(rendered)
+
+            if budget <= 0:
+                # dropped whole, even if shorter than the marker replacing it
+                result = (
+                    f"[... output omitted: {exhausted} output budget exhausted ...]"
+                )
+                self.report.outputs_truncated += 1
+                self.report.chars_dropped += len(rendered)
+                self.report.lines_dropped += len(lines)
+            else:
+                result = self._LimitLines(lines, budget)
+                dropped = len(rendered) - len(result)
+                if dropped > 0:
+                    self.report.outputs_truncated += 1
+                    self.report.chars_dropped += dropped
+
+            budget = max(0, budget - len(result))
+            limited.append(result)
+
+        self._notebook_left = max(
+            0, self._notebook_left - sum(len(text) for text in limited)
+        )
+
+        return limited
+
+    def _LimitLines(self, lines: list[str], budget: int) -> str:
+        lines = self._TrimLines(lines)
+        lines = self._CollapseRepeats(lines)
+        lines = self._KeepHeadTail(lines)
+
+        result = "\n".join(lines)
+        if len(result) > budget:
+            result = self._KeepHeadTailChars(result, budget)
+
+        return result
+
+    @staticmethod
+    def _RenderLine(line: str) -> str:
+        # `\r` rewinds the line in a terminal: only the last segment stays visible
+        line = line.rstrip("\r").rsplit("\r", 1)[-1]
+        return _ANSI_ESCAPE.sub("", line)
+
+    def _TrimLines(self, lines: list[str]) -> list[str]:
+        trimmed: list[str] = []
+
+        for line in lines:
+            if len(line) <= self._max_line_chars:
+                trimmed.append(line)
+                continue
+
+            dropped = len(line) - self._max_line_chars
+            trimmed.append(f"{line[: self._max_line_chars]}... [+{dropped} chars]")
+
+        return trimmed
+
+    def _CollapseRepeats(self, lines: list[str]) -> list[str]:
+        collapsed: list[str] = []
+        index = 0
+
+        while index < len(lines):
+            end = index + 1
+            while end < len(lines) and lines[end] == lines[index]:
+                end += 1
+
+            collapsed.append(lines[index])
+            repeats = end - index - 1
+            if repeats:
+                collapsed.append(f"[... previous line repeated {repeats} more times]")
+                self.report.lines_dropped += repeats
+
+            index = end
+
+        return collapsed
+
+    def _KeepHeadTail(self, lines: list[str]) -> list[str]:
+        if len(lines) <= self._head_lines + self._tail_lines + 1:
+            return lines
+
+        omitted = len(lines) - self._head_lines - self._tail_lines
+        self.report.lines_dropped += omitted
+
+        tail = lines[-self._tail_lines :] if self._tail_lines else []
+        return [
+            *lines[: self._head_lines],
+            f"[... {omitted} lines omitted ...]",
+            *tail,
+        ]
+
+    def _KeepHeadTailChars(self, text: str, budget: int) -> str:
+        room = max(0, budget - _CHARS_MARKER_RESERVE)
+        head = room * 2 // 3
+        tail = room - head
+        omitted = len(text) - head - tail
+
+        self.report.lines_dropped += text.count("\n", head, len(text) - tail)
+
+        marker = f"\n[... {omitted} chars omitted ...]\n"
+        return text[:head] + marker + (text[-tail:] if tail else "")
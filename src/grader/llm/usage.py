@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class LLMUsage:
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0  # OpenRouter credits, if reported
+    latency: float = 0.0
+
+    @property
+    def cached_share(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def __add__(self, other: LLMUsage) -> LLMUsage:
+        return LLMUsage(
+            input_tokens=self.input_tokens + other.input_tokens,
+            cached_tokens=self.cached_tokens + other.cached_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+            cost=self.cost + other.cost,
+            latency=self.latency + other.latency,
+        )
+
+    @staticmethod
+    def FromResponse(resp: Any, latency: float) -> LLMUsage:
+        """
+        Reads token counts from a Responses API `usage`.
+        Providers may omit `usage` or its `input_tokens_details`.
+        """
+        usage = getattr(resp, "usage", None)
+        if usage is None:
+            return LLMUsage(latency=latency)
+
+        details = getattr(usage, "input_tokens_details", None)
+
+        return LLMUsage(
+            input_tokens=usage.input_tokens or 0,
+            cached_tokens=(getattr(details, "cached_tokens", 0) or 0),
+            output_tokens=usage.output_tokens or 0,
+            cost=float(getattr(usage, "cost", 0) or 0),
+            latency=latency,
+        )
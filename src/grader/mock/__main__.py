@@ -0,0 +1,45 @@
+import argparse
+import logging
+
+from aiohttp import web
+
+from grader.mock.server import MockConfig, MockOpenRouter
+
+
+def _ParseArgs() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m grader.mock",
+        description="Local OpenRouter-compatible mock of POST /api/v1/responses.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-median", type=float, default=2.0, help="seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal")
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0.0, help="share of 429"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="seconds")
+    parser.add_argument("--stream-chunk-chars", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+
+# $ python -m grader.mock --latency-median 3 --error-rate 0.05
+# OPENROUTER_BASE_URL=http://127.0.0.1:8089/api/v1
+if __name__ == "__main__":
+    args = _ParseArgs()
+    logging.basicConfig(level=logging.INFO)
+
+    mock = MockOpenRouter(
+        MockConfig(
+            latency_median=args.latency_median,
+            latency_sigma=args.latency_sigma,
+            rate_limit_rate=args.rate_limit_rate,
+            error_rate=args.error_rate,
+            retry_after=args.retry_after,
+            stream_chunk_chars=args.stream_chunk_chars,
+            seed=args.seed,
+        )
+    )
+    web.run_app(mock.App(), host=args.host, port=args.port)
@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import logging
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from grader.core.configs.settings import settings
+from grader.llm.batch import BatchSubmission, GradeBatch
+from grader.llm.client import openrouter
+from grader.llm.execute import kernel_pool
+from grader.llm.executor import grading_executor
+from grader.llm.filenames import Filenames
+from grader.llm.hedge import grading_latency, hedge_stats
+from grader.llm.reference import ProcessReference
+from grader.llm.report import report_renderer
+
+
+def _ParseArgs() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m grader.mock.bench",
+        description=(
+            "Grades copies of one student notebook end-to-end "
+            "(conversion, LLM, PDF) and reports throughput."
+        ),
+    )
+    parser.add_argument(
+        "directory",
+        type=Path,
+        help="directory with `reference/hw.ipynb` and `student/hw.ipynb`",
+    )
+    parser.add_argument("--submissions", type=int, default=20)
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.GRADING_BATCH_CONCURRENCY
+    )
+    return parser.parse_args()
+
+
+async def _Bench(directory: Path, count: int, concurrency: int) -> None:
+    # every request must reach the (mock) server and no DB is needed
+    settings.GRADING_CACHE_ENABLED = False
+    settings.GRADING_RECORD_LLM_CALLS = False
+
+    reference_path = directory / "reference"
+    if not (reference_path / Filenames.task_structure.value).exists():
+        await ProcessReference(reference_path)
+
+    with tempfile.TemporaryDirectory(prefix="grader-bench-") as temp:
+        submissions: list[BatchSubmission] = []
+        for index in range(count):
+            path = Path(temp) / f"submission_{index:04d}"
+            path.mkdir()
+            shutil.copyfile(
+                directory / "student" / Filenames.ipynb.value,
+                path / Filenames.ipynb.value,
+            )
+            submissions.append(BatchSubmission(name=path.name, path=path))
+
+        finished_at: list[float] = []
+
+        async def _OnProgress(finished: int, total: int) -> None:
+            finished_at.append(time.monotonic())
+
+        started = time.monotonic()
+        await GradeBatch(reference_path, submissions, concurrency, _OnProgress)
+        elapsed = time.monotonic() - started
+
+    failed = sum(submission.error is not None for submission in submissions)
+    completions = [moment - started for moment in finished_at]
+
+    logging.info(
+        f"Graded {count - failed}/{count} submissions in {elapsed:.1f}s: "
+        f"{count / elapsed:.2f} submissions/s, concurrency={concurrency}, "
+        f"rate limit={settings.OPENROUTER_MAX_REQUESTS_PER_MINUTE}/min."
+    )
+    if completions:
+        logging.info(
+            f"First result after {completions[0]:.1f}s, "
+            f"median {statistics.median(completions):.1f}s."
+        )
+    logging.info(f"LLM latency and hedging: {hedge_stats.IntoDict()}.")
+    logging.info(f"LLM p95 latency: {grading_latency.Percentile(95)}.")
+
+
+async def main() -> None:
+    args = _ParseArgs()
+    logging.basicConfig(level=logging.INFO)
+
+    grading_executor.Start()
+    report_renderer.Start()
+    kernel_pool.Start()
+    openrouter.Start()
+    try:
+        await _Bench(args.directory, args.submissions, args.concurrency)
+    finally:
+        await openrouter.Close()
+        await kernel_pool.Shutdown()
+        await report_renderer.Shutdown()
+        await grading_executor.Shutdown()
+
+
+# $ python -m grader.mock &
+# $ OPENROUTER_BASE_URL=http://127.0.0.1:8089/api/v1 python -m grader.mock.bench data/bench
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from weasyprint import HTML
+
+from grader.llm.report import ReportHTML, ReportRenderer
+
+_COMMENT = (
+    "Решение в целом верное: данные загружены корректно, модель обучена, "
+    "метрика посчитана на отложенной выборке. Не хватает обоснования выбора "
+    "гиперпараметров и анализа ошибок. "
+)
+
+
+def _ParseArgs() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m grader.mock.reports",
+        description="Measures PDF report rendering throughput (reports/s).",
+    )
+    parser.add_argument("--reports", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--inline",
+        type=int,
+        default=10,
+        help="reports rendered the old way (in-process, cold) for comparison",
+    )
+    return parser.parse_args()
+
+
+def _WriteInputs(directory: Path, tasks: int) -> tuple[Path, Path]:
+    tasks_path = directory / "hw_structure.txt"
+    results_path = directory / "result.txt"
+
+    titles = [f"Задача {index + 1}" for index in range(tasks)]
+    tasks_path.write_text(
+        json.dumps(
+            {
+                "tasks": [
+                    {
+                        "title": title,
+                        "description": f"Описание: {_COMMENT * 2}",
+                        "maximumScore": 10,
+                    }
+                    for title in titles
+                ]
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    results_path.write_text(
+        json.dumps(
+            {title: {"score": 7, "comment": _COMMENT * 3} for title in titles},
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+
+    return tasks_path, results_path
+
+
+def _BenchInline(
+    directory: Path, tasks_path: Path, results_path: Path, count: int
+) -> None:
+    started = time.monotonic()
+    for index in range(count):
+        HTML(string=ReportHTML(tasks_path, results_path)).write_pdf(
+            str(directory / f"inline_{index:04d}.pdf")
+        )
+    elapsed = time.monotonic() - started
+
+    logging.info(
+        f"inline: {count / elapsed:.2f} reports/s ({count} in {elapsed:.1f}s)."
+    )
+
+
+async def _BenchPool(
+    directory: Path, tasks_path: Path, results_path: Path, count: int, workers: int
+) -> None:
+    renderer = ReportRenderer(workers)
+    renderer.Start()
+    try:
+        # wait for the warm-up, as a long-running process would have done it already
+        await asyncio.gather(
+            *(
+                renderer.Render(tasks_path, results_path, directory / "warm.pdf")
+                for _ in range(workers)
+            )
+        )
+
+        started = time.monotonic()
+        await asyncio.gather(
+            *(
+                renderer.Render(
+                    tasks_path, results_path, directory / f"pool_{index:04d}.pdf"
+                )
+                for index in range(count)
+            )
+        )
+        elapsed = time.monotonic() - started
+    finally:
+        await renderer.Shutdown()
+
+    logging.info(
+        f"{workers} workers: {count / elapsed:.2f} reports/s ({count} in {elapsed:.1f}s)."
+    )
+
+
+async def main() -> None:
+    args = _ParseArgs()
+    logging.basicConfig(level=logging.INFO)
+
+    with tempfile.TemporaryDirectory(prefix="grader-reports-") as temp:
+        directory = Path(temp)
+        tasks_path, results_path = _WriteInputs(directory, args.tasks)
+
+        if args.inline:
+            _BenchInline(directory, tasks_path, results_path, args.inline)
+        for workers in args.workers:
+            await _BenchPool(directory, tasks_path, results_path, args.reports, workers)
+
+
+# $ python -m grader.mock.reports --reports 300 --workers 1 2 4 8
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from aiohttp import web
+
+_DEFAULT_NUMBER_SPAN = 10
+_CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class MockConfig:
+    """
+    Behaviour of the mock: request latency is log-normal around `latency_median`
+    (`latency_sigma` = 0 makes it constant); a share of requests fails with 429
+    (with `Retry-After`) or 503.
+    """
+
+    latency_median: float = 2.0
+    latency_sigma: float = 0.5
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    retry_after: float = 1.0
+    stream_chunk_chars: int = 16
+    seed: int | None = None
+
+
+class _SchemaFaker:
+    """
+    Produces a random value valid against the subset of JSON Schema
+    used by strict structured outputs.
+    """
+
+    def __init__(self, rng: random.Random):
+        self._rng = rng
+
+    def Value(  # noqa: PLR0911
+        self, schema: dict[str, Any], name: str = "value"
+    ) -> Any:
+        if "enum" in schema:
+            return self._rng.choice(schema["enum"])
+
+        kind = schema.get("type", "object")
+        if isinstance(kind, list):  # e.g. ["string", "null"]
+            kind = next((k for k in kind if k != "null"), "null")
+
+        if kind == "object":
+            return {
+                key: self.Value(prop, key)
+                for key, prop in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            low = schema.get("minItems", 0)
+            high = schema.get("maxItems", max(low, 3))
+            count = self._rng.randint(low, high)
+            return [self.Value(schema.get("items", {}), name) for _ in range(count)]
+        if kind in ("number", "integer"):
+            low = schema.get("minimum", 0)
+            high = schema.get("maximum", low + _DEFAULT_NUMBER_SPAN)
+            if kind == "integer":
+                return self._rng.randint(math.ceil(low), math.floor(high))
+            return round(self._rng.uniform(low, high), 1)
+        if kind == "boolean":
+            return self._rng.random() < 0.5  # noqa: PLR2004
+        if kind == "null":
+            return None
+
+        text = f"Mock {name} {uuid.uuid4().hex[:8]}"
+        return text.ljust(schema.get("minLength", 0), ".")
+
+
+def _Tokens(text: str) -> int:
+    return max(1, len(text) // _CHARS_PER_TOKEN)
+
+
+def _InputText(payload: dict[str, Any]) -> str:
+    messages = payload.get("input", "")
+    if isinstance(messages, str):
+        return messages
+    return "".join(str(message.get("content", "")) for message in messages)
+
+
+def _Response(payload: dict[str, Any], text: str, status: str) -> dict[str, Any]:
+    input_tokens = _Tokens(_InputText(payload))
+    output_tokens = _Tokens(text)
+
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": payload.get("model", "mock"),
+        "status": status,
+        "output": [
+            {
+                "id": f"msg_{uuid.uuid4().hex}",
+                "type": "message",
+                "role": "assistant",
+                "status": status,
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+            "cost": 0.0,
+        },
+    }
+
+
+class MockOpenRouter:
+    """
+    A stand-in for OpenRouter's `POST /api/v1/responses`: answers with random
+    JSON that satisfies the requested `json_schema`, streamed or not.
+    """
+
+    def __init__(self, config: MockConfig):
+        self._config = config
+        self._rng = random.Random(config.seed)  # noqa: S311
+        self._faker = _SchemaFaker(self._rng)
+
+        self.requests = 0
+
+    def App(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/v1/responses", self._HandleResponses)
+        return app
+
+    def _Latency(self) -> float:
+        if self._config.latency_sigma <= 0:
+            return self._config.latency_median
+        return self._rng.lognormvariate(
+            math.log(self._config.latency_median), self._config.latency_sigma
+        )
+
+    def _Failure(self) -> web.Response | None:
+        roll = self._rng.random()
+
+        if roll < self._config.rate_limit_rate:
+            return web.json_response(
+                {"error": {"message": "Mock rate limit", "code": 429}},
+                status=429,
+                headers={"Retry-After": str(self._config.retry_after)},
+            )
+        if roll < self._config.rate_limit_rate + self._config.error_rate:
+            return web.json_response(
+                {"error": {"message": "Mock provider error", "code": 503}},
+                status=503,
+            )
+
+        return None
+
+    async def _HandleResponses(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        payload: dict[str, Any] = await request.json()
+
+        latency = self._Latency()
+        failure = self._Failure()
+        if failure is not None:
+            await asyncio.sleep(latency * self._rng.random())
+            return failure
+
+        schema = payload.get("text", {}).get("format", {}).get("schema", {})
+        text = json.dumps(self._faker.Value(schema), ensure_ascii=False)
+
+        logging.info(
+            f"Mock response #{self.requests}: {latency:.2f}s, {len(text)} chars, "
+            f"stream={bool(payload.get('stream'))}."
+        )
+
+        if not payload.get("stream"):
+            await asyncio.sleep(latency)
+            return web.json_response(_Response(payload, text, "completed"))
+
+        return await self._Stream(request, payload, text, latency)
+
+    async def _Stream(
+        self,
+        request: web.Request,
+        payload: dict[str, Any],
+        text: str,
+        latency: float,
+    ) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        sequence = 0
+
+        async def _Send(event: dict[str, Any]) -> None:
+            nonlocal sequence
+            event["sequence_number"] = sequence
+            sequence += 1
+            await response.write(
+                f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+            )
+
+        size = self._config.stream_chunk_chars
+        chunks = [text[i : i + size] for i in range(0, len(text), size)]
+        # time to first token, then the rest spread evenly over the chunks
+        first_token = latency / 4
+        per_chunk = (latency - first_token) / max(1, len(chunks))
+
+        await _Send(
+            {
+                "type": "response.created",
+                "response": _Response(payload, "", "in_progress"),
+            }
+        )
+        await asyncio.sleep(first_token)
+
+        for chunk in chunks:
+            await _Send(
+                {
+                    "type": "response.output_text.delta",
+                    "item_id": "msg_mock",
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": chunk,
+                }
+            )
+            await asyncio.sleep(per_chunk)
+
+        await _Send(
+            {
+                "type": "response.completed",
+                "response": _Response(payload, text, "completed"),
+            }
+        )
+        await response.write_eof()
+
+        return response
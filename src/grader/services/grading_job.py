@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from grader.db.repositories.grading_job import GradingJobRepository
+from grader.db.session import AsyncSessionLocal
+
+
+class GradingJobService:
+    def __init__(self, job_repo: GradingJobRepository):
+        self._job = job_repo
+
+        # --- Create ---
+        self.CreateJob = self._job.CreateJob
+
+        # --- Read ---
+        self.GetJob = self._job.GetJob
+
+        # --- Update ---
+        self.ClaimJob = self._job.ClaimJob
+        self.UpdateStatus = self._job.UpdateStatus
+        self.TouchJob = self._job.TouchJob
+        self.SetExecutionSeconds = self._job.SetExecutionSeconds
+        self.FailExpiredJobs = self._job.FailExpiredJobs
+        self.RequeueStaleJobs = self._job.RequeueStaleJobs
+
+    # --- Read ---
+    async def HasUnfinishedJobs(self, chat_id: int) -> bool:
+        return await self._job.CountUnfinishedJobs(chat_id) > 0
+
+    @staticmethod
+    def Create() -> GradingJobService:
+        return GradingJobService(GradingJobRepository(AsyncSessionLocal))
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from grader.db.repositories.llm_call import LLMCallRepository
+from grader.db.session import AsyncSessionLocal
+
+
+class LLMCallService:
+    def __init__(self, call_repo: LLMCallRepository):
+        self._call = call_repo
+
+        # --- Create ---
+        self.CreateCall = self._call.CreateCall
+
+        # --- Read ---
+        self.GetLatencyPercentiles = self._call.GetLatencyPercentiles
+        self.GetTokensPerSubmission = self._call.GetTokensPerSubmission
+        self.GetSpendPerDay = self._call.GetSpendPerDay
+        self.GetSpendPerUser = self._call.GetSpendPerUser
+
+    @staticmethod
+    def Create() -> LLMCallService:
+        return LLMCallService(LLMCallRepository(AsyncSessionLocal))
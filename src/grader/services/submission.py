@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from grader.db.repositories.submission import SubmissionRepository
+from grader.db.session import AsyncSessionLocal
+
+
+class SubmissionService:
+    def __init__(self, submission_repo: SubmissionRepository):
+        self._submission = submission_repo
+
+        # --- Create ---
+        self.CreateSubmission = self._submission.CreateSubmission
+
+        # --- Read ---
+        self.GetLatestSubmission = self._submission.GetLatestSubmission
+
+    @staticmethod
+    def Create() -> SubmissionService:
+        return SubmissionService(SubmissionRepository(AsyncSessionLocal))
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+
+import asyncpg
+
+from grader.core.configs.constants import GRADING_JOBS_CHANNEL
+from grader.core.configs.settings import settings
+
+
+class JobNotifications:
+    """
+    Wakes up idle worker slots on `NOTIFY grading_jobs`.
+
+    Every notification sets the current event and replaces it with a fresh one,
+    so a slot that grabbed the event before polling the queue never misses
+    a notification that arrives in between.
+    """
+
+    def __init__(self) -> None:
+        self._event = asyncio.Event()
+        self._connection: asyncpg.Connection | None = None
+
+    async def Start(self) -> None:
+        # asyncpg expects a plain libpq DSN, without the SQLAlchemy driver suffix
+        dsn = settings.POSTGRES_DSN.get_secret_value().replace(
+            "postgresql+asyncpg://", "postgresql://", 1
+        )
+
+        self._connection = await asyncpg.connect(dsn)
+        await self._connection.add_listener(GRADING_JOBS_CHANNEL, self._OnNotify)
+
+        logging.info(f"# Listening on '{GRADING_JOBS_CHANNEL}' channel.")
+
+    async def Stop(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    def _OnNotify(
+        self,
+        connection: asyncpg.Connection,
+        pid: int,
+        channel: str,
+        payload: str,
+    ) -> None:
+        self.Wake()
+
+    def Wake(self) -> None:
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    @property
+    def event(self) -> asyncio.Event:
+        return self._event
+
+    @staticmethod
+    async def Wait(event: asyncio.Event, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except TimeoutError:
+            pass
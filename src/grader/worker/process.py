@@ -0,0 +1,296 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any
+
+from aiogram import types
+
+from grader.bot.lib.grading.jobs import FORCE_CAPTION, PDF_COMMAND
+from grader.bot.lib.message.io import ContextIO, SendDocument, SendMessage
+from grader.bot.lib.message.keyboard import ipynb_keyboard
+from grader.bot.lib.message.progress import ProgressMessage
+from grader.bot.lib.notification.erroring import NotifyAdminsOfError
+from grader.core.configs.settings import settings
+from grader.db.models.grading_job import GradingJob, GradingJobKind, GradingJobStatus
+from grader.db.models.user import User
+from grader.db.repositories.grading_job import JobLeaseLostError
+from grader.llm.accounting import LLMCallOwner, llm_call_owner
+from grader.llm.batch import ExtractSubmissions, GradeBatch, WriteBatchResults
+from grader.llm.execute import ExecuteSubmission
+from grader.llm.executor import grading_executor
+from grader.llm.grader import (
+    ConvertStudentNotebook,
+    GradeStudentNotebook,
+    RenderStudentReport,
+    StudentScoreSummary,
+)
+from grader.llm.incremental import RecordSubmission, ReusePreviousResults
+from grader.llm.reference import (
+    ConvertReferenceNotebook,
+    RestoreReference,
+    StoreReference,
+    StructureReference,
+)
+from grader.services.grading_job import GradingJobService
+from grader.services.user import UserService
+
+
+async def _ProcessReferenceJob(job: GradingJob, srv: GradingJobService) -> None:
+    directory_path = Path(job.directory)
+
+    restored = not job.force and await grading_executor.Run(
+        RestoreReference, directory_path
+    )
+
+    if not restored:
+        await grading_executor.Run(ConvertReferenceNotebook, directory_path)
+
+        await srv.UpdateStatus(job.id, job.worker_id, GradingJobStatus.grading)
+        await StructureReference(directory_path)
+
+        await grading_executor.Run(StoreReference, directory_path)
+
+    await UserService.Create().UpdateUser(
+        chat_id=job.chat_id,
+        column=User.has_reference,
+        value=True,
+    )
+
+    text = "✅ Эталонное решение загружено и обработано"
+    if restored:
+        text += (
+            "\n\nЭтот эталон уже обрабатывался, использована сохраненная структура задач."
+            f"\nЧтобы построить ее заново, отправьте файл с подписью «{FORCE_CAPTION}»"
+        )
+
+    await SendMessage(
+        chat_id=job.chat_id,
+        text=text,
+        reply_markup=ipynb_keyboard,
+    )
+
+
+def _RenderTasksProgress(done: int, total: int) -> str:
+    return f"⏳ Оценено задач: {done} из {total}"
+
+
+async def _ProcessStudentJob(job: GradingJob, srv: GradingJobService) -> None:
+    directory_path = Path(job.directory)
+
+    seconds = await ExecuteSubmission(directory_path / "student")
+    if seconds is not None:
+        await srv.SetExecutionSeconds(job.id, seconds)
+
+    prepared = await grading_executor.Run(ConvertStudentNotebook, directory_path)
+
+    reused: dict[str, Any] = {}
+    if prepared.state is not None:
+        previous = await ReusePreviousResults(
+            job, directory_path / "reference", prepared.state
+        )
+        # the numeric check is as cheap and always current
+        reused = {t: r for t, r in previous.items() if t not in prepared.verified}
+        prepared.verified.update(reused)
+
+    await srv.UpdateStatus(job.id, job.worker_id, GradingJobStatus.grading)
+
+    progress = ProgressMessage(job.chat_id, _RenderTasksProgress)
+    await progress.Start("⏳ Оцениваем решение")
+
+    await GradeStudentNotebook(directory_path, prepared, progress.Report)
+    await progress.Finish()
+
+    send_pdf = await UserService.Create().GetUser(
+        chat_id=job.chat_id,
+        column=User.send_pdf,
+    )
+    summary = StudentScoreSummary(directory_path)
+
+    # the scores are known: they go out while the PDF renders
+    await srv.UpdateStatus(job.id, job.worker_id, GradingJobStatus.rendering)
+    report = (
+        asyncio.create_task(RenderStudentReport(directory_path))
+        if send_pdf is not False
+        else None
+    )
+
+    if reused:
+        summary += (
+            f"\n\nЗадачи без изменений с прошлой отправки файла «{job.file_name}» "
+            f"({len(reused)}) не проверялись заново, их оценки сохранены"
+        )
+    if report is None:
+        summary += f"\n\nPDF-отчеты отключены, включить: /{PDF_COMMAND}"
+
+    await SendMessage(
+        chat_id=job.chat_id,
+        text=summary,
+        reply_markup=ipynb_keyboard,
+    )
+
+    if prepared.state is not None:
+        await RecordSubmission(
+            job,
+            directory_path / "student",
+            prepared.state,
+            reused=len(reused),
+        )
+
+    if report is not None:
+        await _DeliverReport(job.chat_id, directory_path, report)
+
+
+async def _DeliverReport(
+    chat_id: int, directory_path: Path, report: asyncio.Task[None]
+) -> None:
+    """
+    Sends the PDF once rendered. The scores are delivered already, so a failed
+    render is reported as such rather than as a failed grading.
+    """
+    try:
+        await report
+    except Exception as e:
+        logging.exception(f"Report of chat {chat_id} failed to render.")
+        await SendMessage(
+            chat_id=chat_id,
+            text="❌ Не удалось сформировать PDF-отчет. Оценки из сообщения выше сохранены",
+            reply_markup=ipynb_keyboard,
+            context=ContextIO.Error,
+        )
+        await NotifyAdminsOfError(e)
+        return
+
+    await SendDocument(
+        chat_id=chat_id,
+        document=types.FSInputFile(directory_path / "student" / "result.pdf"),
+        caption="📄 Отчет по проверке",
+        reply_markup=ipynb_keyboard,
+    )
+
+
+async def _ProcessBatchJob(job: GradingJob, srv: GradingJobService) -> None:
+    directory_path = Path(job.directory)
+    reference_path = directory_path / "reference"
+    batch_path = directory_path / "batch"
+
+    submissions = await grading_executor.Run(
+        ExtractSubmissions,
+        batch_path,
+        settings.GRADING_BATCH_MAX_FILES,
+        settings.GRADING_BATCH_MAX_FILE_MB * 1024 * 1024,
+        settings.GRADING_BATCH_MAX_ARCHIVE_MB * 1024 * 1024,
+    )
+    if not submissions:
+        await SendMessage(
+            chat_id=job.chat_id,
+            text="❌ В архиве не найдено ни одного файла .ipynb",
+            reply_markup=ipynb_keyboard,
+            context=ContextIO.UserFailed,
+        )
+        return
+
+    progress = ProgressMessage(
+        job.chat_id, lambda done, total: f"⏳ Проверено {done} из {total}"
+    )
+    await progress.Start(f"Найдено решений: {len(submissions)}. Приступаем к оценке")
+
+    async def _OnProgress(finished: int, total: int) -> None:
+        progress.Update(finished, total)
+
+    await srv.UpdateStatus(job.id, job.worker_id, GradingJobStatus.grading)
+    await GradeBatch(
+        reference_path=reference_path,
+        submissions=submissions,
+        concurrency=settings.GRADING_BATCH_CONCURRENCY,
+        on_progress=_OnProgress,
+    )
+    await progress.Finish()
+
+    executed = [s.execution_seconds for s in submissions if s.execution_seconds]
+    if executed:
+        await srv.SetExecutionSeconds(job.id, sum(executed))
+
+    await srv.UpdateStatus(job.id, job.worker_id, GradingJobStatus.rendering)
+    results_path, summary = await grading_executor.Run(
+        WriteBatchResults, reference_path, batch_path, submissions
+    )
+
+    await SendDocument(
+        chat_id=job.chat_id,
+        document=types.FSInputFile(results_path),
+        caption=f"📦 Отчеты по проверке\n\n{summary}",
+        reply_markup=ipynb_keyboard,
+    )
+
+
+_PROCESSORS = {
+    GradingJobKind.reference: _ProcessReferenceJob,
+    GradingJobKind.student: _ProcessStudentJob,
+    GradingJobKind.batch: _ProcessBatchJob,
+}
+
+_FAILURE_TEXT = {
+    GradingJobKind.reference: "❌ Не удалось обработать эталонное решение. Попробуйте загрузить его еще раз.",
+    GradingJobKind.student: "❌ Не удалось проверить решение. Попробуйте загрузить его еще раз.",
+    GradingJobKind.batch: "❌ Не удалось проверить архив решений. Попробуйте загрузить его еще раз.",
+}
+
+
+async def NotifyJobFailed(chat_id: int, kind: GradingJobKind) -> None:
+    await SendMessage(
+        chat_id=chat_id,
+        text=_FAILURE_TEXT[kind],
+        reply_markup=ipynb_keyboard,
+        context=ContextIO.Error,
+    )
+
+
+async def _KeepLease(job: GradingJob, srv: GradingJobService) -> None:
+    """
+    Extends the job's lease while it runs, so a long stage (execution, a slow
+    model, a large batch) is not requeued as stale. Stops once the lease is
+    lost: the next status update raises `JobLeaseLostError`.
+    """
+    interval = settings.GRADING_JOB_LEASE_SECONDS / 3
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await srv.TouchJob(job.id, job.worker_id):
+                logging.warning(f"GradingJob(id={job.id}) lease lost.")
+                return
+        except Exception:
+            logging.exception(f"Failed to extend the lease of GradingJob(id={job.id}).")
+
+
+async def ProcessJob(job: GradingJob) -> None:
+    """
+    Runs a claimed job stage by stage, recording each stage in `grading_jobs`,
+    and delivers the result (or the failure) to the job's chat. A job whose
+    lease was lost is left to the worker that holds it now.
+    """
+    srv = GradingJobService.Create()
+    llm_call_owner.set(LLMCallOwner(chat_id=job.chat_id, job_id=job.id))
+    heartbeat = asyncio.create_task(_KeepLease(job, srv))
+
+    try:
+        await _PROCESSORS[job.kind](job, srv)
+        await srv.UpdateStatus(job.id, job.worker_id, GradingJobStatus.done)
+
+    except JobLeaseLostError:
+        logging.warning(f"GradingJob(id={job.id}) abandoned: its lease was lost.")
+
+    except Exception as e:
+        logging.exception(f"GradingJob(id={job.id}, chat_id={job.chat_id}) failed.")
+        try:
+            await srv.UpdateStatus(
+                job.id, job.worker_id, GradingJobStatus.failed, error=repr(e)
+            )
+        except JobLeaseLostError:
+            return
+
+        await NotifyJobFailed(job.chat_id, job.kind)
+        await NotifyAdminsOfError(e)
+
+    finally:
+        heartbeat.cancel()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from grader.core.configs.settings import settings
+from grader.services.grading_job import GradingJobService
+from grader.worker.notify import JobNotifications
+from grader.worker.process import NotifyJobFailed, ProcessJob
+
+
+class GradingWorker:
+    """
+    Claims jobs from `grading_jobs` and runs up to `slots` of them concurrently.
+    Idle slots sleep until a `NOTIFY` arrives or the poll interval elapses.
+    """
+
+    def __init__(self, slots: int):
+        self._slots = slots
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._notifications = JobNotifications()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def Start(self) -> None:
+        await self._notifications.Start()
+
+        self._tasks = [asyncio.create_task(self._RunSlot()) for _ in range(self._slots)]
+        self._tasks.append(asyncio.create_task(self._RunJanitor()))
+
+        logging.info(
+            f"# Grading worker '{self._worker_id}' started: {self._slots} slots."
+        )
+
+    async def Stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        await self._notifications.Stop()
+
+        logging.info(f"# Grading worker '{self._worker_id}' stopped.")
+
+    async def Wait(self) -> None:
+        await asyncio.gather(*self._tasks)
+
+    async def _RunSlot(self) -> None:
+        srv = GradingJobService.Create()
+
+        while True:
+            event = self._notifications.event
+
+            try:
+                job = await srv.ClaimJob(self._worker_id)
+            except Exception:
+                logging.exception("Failed to claim grading job.")
+                job = None
+
+            if job is None:
+                await JobNotifications.Wait(
+                    event, timeout=settings.GRADING_WORKER_POLL_SECONDS
+                )
+                continue
+
+            try:
+                await ProcessJob(job)
+            except Exception:
+                logging.exception(f"GradingJob(id={job.id}) left unfinished.")
+
+    async def _RunJanitor(self) -> None:
+        srv = GradingJobService.Create()
+        lease = timedelta(seconds=settings.GRADING_JOB_LEASE_SECONDS)
+
+        while True:
+            try:
+                failed = await srv.FailExpiredJobs(
+                    lease=lease,
+                    max_attempts=settings.GRADING_JOB_MAX_ATTEMPTS,
+                )
+                for chat_id, kind in failed:
+                    await NotifyJobFailed(chat_id, kind)
+
+                if await srv.RequeueStaleJobs(lease=lease):
+                    self._notifications.Wake()
+            except Exception:
+                logging.exception("Failed to requeue stale grading jobs.")
+
+            await asyncio.sleep(settings.GRADING_WORKER_POLL_SECONDS)
+
+
+grading_worker = GradingWorker(slots=settings.GRADING_MAX_CONCURRENCY)
@@ -0,0 +1,183 @@
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from grader.core.configs.settings import settings
+from grader.llm import relevance
+from grader.llm.align import CellMatch
+from grader.llm.convert import NotebookCell
+from grader.llm.relevance import CellIndex, SelectRelevantCells, TaskQueries
+
+
+def _Cell(index: int, source: str, *outputs: str) -> NotebookCell:
+    return NotebookCell(index, "code", source, output_texts=list(outputs))
+
+
+def _Cells(*sources: str) -> list[NotebookCell]:
+    return [_Cell(index, source) for index, source in enumerate(sources)]
+
+
+STUDENT = _Cells(
+    "import pandas as pd",
+    "data = pd.read_csv('train.csv')",
+    "model = LinearRegression().fit(x_train, y_train)",
+    "plt.hist(data['age'])",
+    "print(data.shape)",
+)
+FIT, HISTOGRAM, SHAPE = 2, 3, 4  # positions in `STUDENT`
+REFERENCE = _Cells(
+    "import pandas as pd",
+    "# fit a linear regression\nmodel = LinearRegression()",
+    "# age histogram\nplt.hist(data['age'])",
+)
+
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(settings, "GRADING_RELEVANCE_MIN_CELLS", 2)
+    monkeypatch.setattr(settings, "GRADING_RELEVANCE_TOP_K", 3)
+    monkeypatch.setattr(settings, "GRADING_RELEVANCE_TASK_CHARS", 12_000)
+    yield
+    relevance._queries.clear()
+
+
+def _Task(title: str, description: str = "", **extra: Any) -> dict[str, Any]:
+    return {"title": title, "description": description, **extra}
+
+
+def _Select(
+    tasks: list[dict[str, Any]],
+    matches: list[CellMatch] | None = None,
+    candidates: list[int] | None = None,
+) -> dict[str, list[int]] | None:
+    if candidates is None:
+        candidates = list(range(len(STUDENT)))
+    queries = TaskQueries("reference", tasks, REFERENCE)
+    return SelectRelevantCells(tasks, queries, STUDENT, matches or [], candidates)
+
+
+def test_ranks_rare_terms_first() -> None:
+    index = CellIndex(STUDENT)
+
+    assert index.Top("LinearRegression fit", k=3)[0] == FIT
+    assert index.Top("age histogram of the data", k=3)[0] == HISTOGRAM
+
+
+def test_identifiers_match_their_words() -> None:
+    index = CellIndex(_Cells("x = 1", "x_train, x_test = train_test_split(x)"))
+
+    assert index.Top("split the data", k=2) == [1]
+
+
+def test_outputs_are_indexed() -> None:
+    index = CellIndex([_Cell(0, "print(a)", "accuracy 0.93"), _Cell(1, "print(b)")])
+
+    assert index.Top("accuracy", k=2) == [0]
+
+
+def test_drops_cells_far_below_the_best() -> None:
+    index = CellIndex(
+        _Cells(
+            "regression regression regression coefficients",
+            "the regression of the data",
+            "data",
+            "data",
+        )
+    )
+    scores = index.Scores("regression coefficients")
+    assert 0 < scores[1] < 0.5 * scores[0]
+
+    assert index.Top("regression coefficients", k=4) == [0]
+
+
+def test_no_match_ranks_nothing() -> None:
+    assert CellIndex(STUDENT).Top("gradient boosting", k=3) == []
+    assert CellIndex([]).Top("anything", k=3) == []
+
+
+def test_selects_cells_of_every_task() -> None:
+    selected = _Select([_Task("Linear regression"), _Task("Age histogram")])
+
+    assert selected is not None
+    assert FIT in selected["Linear regression"]
+    assert HISTOGRAM in selected["Age histogram"]
+    assert selected["Age histogram"] == sorted(selected["Age histogram"])
+
+
+def test_task_cells_come_from_its_reference_cells() -> None:
+    # nothing in the title matches; the query comes from reference cell 2
+    selected = _Select([_Task("Task 2", cells=[2])])
+
+    assert selected is not None
+    assert HISTOGRAM in selected["Task 2"]
+
+
+def test_aligned_cells_are_kept_without_a_match() -> None:
+    # the student cell shares no word with the task or its reference cell
+    selected = _Select(
+        [_Task("Decision tree", cells=[1])],
+        matches=[CellMatch(student=SHAPE, reference=1)],
+    )
+
+    assert selected is not None
+    assert SHAPE in selected["Decision tree"]
+
+
+def test_only_candidates_are_selected() -> None:
+    selected = _Select([_Task("Age histogram")], candidates=[0, 1, FIT, SHAPE])
+
+    assert selected is not None
+    assert HISTOGRAM not in selected["Age histogram"]
+
+
+def test_char_budget_keeps_the_first_cell(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "GRADING_RELEVANCE_TASK_CHARS", 1)
+
+    selected = _Select([_Task("Age histogram data")])
+
+    assert selected is not None
+    assert len(selected["Age histogram data"]) == 1
+
+
+def test_small_notebooks_are_sent_whole(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "GRADING_RELEVANCE_MIN_CELLS", len(STUDENT) + 1)
+
+    assert _Select([_Task("Linear regression")]) is None
+
+
+def test_unmatched_task_sends_the_whole_notebook() -> None:
+    assert _Select([_Task("Linear regression"), _Task("Gradient boosting")]) is None
+
+
+def test_task_shown_as_identical_is_matched() -> None:
+    # every cell of the task is template code, omitted as identical
+    selected = _Select(
+        [_Task("Gradient boosting", cells=[0])],
+        matches=[CellMatch(student=0, reference=0, identical=True)],
+        candidates=[FIT, HISTOGRAM, SHAPE],
+    )
+
+    assert selected == {"Gradient boosting": []}
+
+
+def test_task_queries_are_built_once_per_reference() -> None:
+    tasks = [_Task("Linear regression"), _Task("Age histogram")]
+
+    queries = TaskQueries("reference", tasks, REFERENCE)
+
+    assert TaskQueries("reference", [], []) is queries
+    assert TaskQueries("other", tasks, REFERENCE) is not queries
+
+
+def test_task_queries_keep_recent_references(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(relevance, "_QUERIES_CACHED", 2)
+    tasks = [_Task("Linear regression")]
+
+    first = TaskQueries("first", tasks, REFERENCE)
+    TaskQueries("second", tasks, REFERENCE)
+    TaskQueries("first", tasks, REFERENCE)  # now the most recent
+    TaskQueries("third", tasks, REFERENCE)
+
+    assert TaskQueries("first", tasks, REFERENCE) is first
+    assert "second" not in relevance._queries
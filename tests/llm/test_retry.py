@@ -0,0 +1,214 @@
+import asyncio
+import json
+from collections.abc import Iterator
+
+import httpx2
+import openai
+import pytest
+from aiolimiter import AsyncLimiter
+
+from grader.core.configs.settings import settings
+from grader.db.models.llm_call import LLMCallStage
+from grader.llm import retry
+from grader.llm.retry import (
+    CallWithFallback,
+    CircuitBreaker,
+    LLMOutputError,
+    LLMUnavailableError,
+)
+from grader.llm.usage import LLMUsage
+
+MODEL = "test/model"
+RESET_SECONDS = 60
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def limiter(monkeypatch: pytest.MonkeyPatch) -> None:
+    # one per test: every test runs its own event loop
+    monkeypatch.setattr(retry, "openrouter_limiter", AsyncLimiter(max_rate=100))
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(retry, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock: _Clock) -> Iterator[CircuitBreaker]:
+    """
+    The breaker of `MODEL`, opened by two failures and half-open after `RESET_SECONDS`.
+    """
+    breaker = CircuitBreaker(failures=2, reset_seconds=RESET_SECONDS)
+    retry._breakers[MODEL] = breaker
+    yield breaker
+    retry._breakers.pop(MODEL, None)
+
+
+def _Open(breaker: CircuitBreaker, clock: _Clock) -> None:
+    breaker.RecordFailure()
+    assert breaker.RecordFailure()  # opened by this one
+    clock.now += RESET_SECONDS + 1
+
+
+def _StatusError(status: int) -> openai.APIStatusError:
+    request = httpx2.Request("POST", "http://test/responses")
+    return openai.APIStatusError(
+        "error", response=httpx2.Response(status, request=request), body=None
+    )
+
+
+def test_opens_after_consecutive_failures(breaker: CircuitBreaker) -> None:
+    assert not breaker.RecordFailure()
+    assert breaker.Allow()
+
+    assert breaker.RecordFailure()
+    assert not breaker.Allow()
+    assert breaker.retry_in == RESET_SECONDS
+
+
+def test_success_resets_the_failure_count(breaker: CircuitBreaker) -> None:
+    breaker.RecordFailure()
+    breaker.RecordSuccess()
+
+    assert not breaker.RecordFailure()
+    assert breaker.Allow()
+
+
+def test_half_open_lets_one_trial_through(
+    breaker: CircuitBreaker, clock: _Clock
+) -> None:
+    _Open(breaker, clock)
+
+    assert breaker.Allow()
+    assert breaker.in_trial
+    assert not breaker.Allow()
+
+
+def test_trial_success_closes(breaker: CircuitBreaker, clock: _Clock) -> None:
+    _Open(breaker, clock)
+    breaker.Allow()
+
+    breaker.RecordSuccess()
+
+    assert not breaker.in_trial
+    assert breaker.Allow()
+    assert not breaker.in_trial
+
+
+def test_trial_failure_reopens(breaker: CircuitBreaker, clock: _Clock) -> None:
+    _Open(breaker, clock)
+    breaker.Allow()
+
+    assert not breaker.RecordFailure()  # was open already
+    assert not breaker.in_trial
+    assert not breaker.Allow()
+    assert breaker.retry_in == RESET_SECONDS
+
+
+def test_released_trial_lets_the_next_one_through(
+    breaker: CircuitBreaker, clock: _Clock
+) -> None:
+    _Open(breaker, clock)
+    breaker.Allow()
+
+    breaker.ReleaseTrial()
+
+    assert breaker.Allow()
+    assert breaker.in_trial
+
+
+def test_cancelled_trial_is_released(breaker: CircuitBreaker, clock: _Clock) -> None:
+    _Open(breaker, clock)
+
+    async def _Hang(model: str) -> tuple[str, LLMUsage]:
+        await asyncio.Event().wait()
+        raise AssertionError("unreachable")
+
+    async def _Run() -> None:
+        task = asyncio.create_task(
+            CallWithFallback(_Hang, "test", LLMCallStage.grade, models=[MODEL])
+        )
+        await asyncio.sleep(0.01)
+        assert breaker.in_trial
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(_Run())
+
+    assert not breaker.in_trial
+    assert breaker.Allow()  # a new trial, not stuck half-open forever
+
+
+def test_rejected_trial_neither_closes_nor_reopens(
+    breaker: CircuitBreaker, clock: _Clock
+) -> None:
+    _Open(breaker, clock)
+    calls = 0
+
+    async def _Reject(model: str) -> tuple[str, LLMUsage]:
+        nonlocal calls
+        calls += 1
+        raise _StatusError(400)
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(
+            CallWithFallback(_Reject, "test", LLMCallStage.grade, models=[MODEL])
+        )
+
+    assert calls == 1  # not retried
+    assert not breaker.in_trial
+    assert breaker.retry_in == 0  # still half-open, not reopened
+    assert breaker.Allow()
+    assert breaker.in_trial  # and not closed: the next request is a trial again
+
+
+def test_retries_transient_failures_then_succeeds(
+    breaker: CircuitBreaker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "OPENROUTER_BACKOFF_BASE_SECONDS", 0)
+    failures = [LLMOutputError("broken stream")]
+
+    async def _Flaky(model: str) -> tuple[str, LLMUsage]:
+        if failures:
+            raise failures.pop()
+        return "ok", LLMUsage()
+
+    result, _ = asyncio.run(
+        CallWithFallback(_Flaky, "test", LLMCallStage.grade, models=[MODEL])
+    )
+
+    assert result == "ok"
+    assert not failures
+    assert not breaker.RecordFailure()  # the success reset the count
+
+
+@pytest.mark.parametrize(
+    ("error", "retryable"),
+    [
+        (_StatusError(429), True),
+        (_StatusError(503), True),
+        (_StatusError(400), False),
+        (_StatusError(401), False),
+        (json.JSONDecodeError("Expecting value", "", 0), True),
+        (LLMOutputError("stream ended"), True),
+        (ValueError("a bug"), False),
+        (RuntimeError("a bug"), False),
+    ],
+)
+def test_is_retryable(error: Exception, retryable: bool) -> None:
+    assert retry._IsRetryable(error) is retryable